@@ -1,13 +1,78 @@
 import os
 import sys
+import datetime
 import streamlit as st
 import pandas as pd
 
 # Asegurar que el directorio raíz esté en el PATH para importaciones en Streamlit Cloud
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules.processing import process_8h_data, process_12h_data, calculate_global_stats
-from modules.visualization import create_global_chart, create_alce_chart
+from modules import prefetch
+from modules.processing import FILE_KEYS, calculate_global_stats, build_fleet_summary, process_sites
+from modules.visualization import create_global_chart, create_alce_chart, create_site_chart, create_trend_chart, create_shift_delta_chart
+from modules.ingest import route_uploads, detect_operational_date
+from modules import snapshots
+from modules import trends
+from modules.data_table import build_table_index, facet_values, query_table, SORT_COLUMNS
+
+# Snapshots mapeados en memoria: un único objeto compartido por todas las sesiones
+load_snapshot = st.cache_resource(snapshots.load_snapshot)
+
+@st.cache_data
+def load_trend_history(shift_key, multi_site, snapshot_ids):
+    """
+    Multi-day history of a shift scheme; snapshot_ids only keys the cache so new days invalidate it.
+    """
+    return trends.load_history(shift_key, multi_site, loader=load_snapshot)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def detect_day(files):
+    return detect_operational_date(files)
+
+def operational_date_input(files):
+    """
+    Day of operation the uploads cover: read from the exports when they carry it and editable
+    before processing. Defaults to the current operational day (06:00 to 06:00).
+    """
+    present = [f for f in files if f is not None]
+    detected = detect_day(present) if present else None
+    default = detected or (datetime.datetime.now() - datetime.timedelta(hours=snapshots.DAY_START_HOUR)).date()
+    return st.date_input("📅 Día de operación", value=default, format="YYYY-MM-DD",
+                         help="Día que cubren los reportes; el turno de la noche cuenta para el día en que empezó.")
+
+def start_speculation(shift_key, files, engine):
+    """
+    Starts parsing each uploaded file as soon as it arrives and, once all are present,
+    the whole pipeline; returns the future of the result (None while files are missing).
+    """
+    if any(f is None for f in files):
+        for f, role in zip(files, FILE_KEYS[shift_key]):
+            if f is not None:
+                prefetch.prefetch_file(f, engine, shift_key, role)
+        return None
+    future = prefetch.speculate(shift_key, files, engine)
+    st.caption("⚡ Análisis listo para mostrar" if future.done() else "⏳ Procesando en segundo plano...")
+    return future
+
+def store_results(data, shift_key, global_stats=None, save=True, operational_date=None):
+    """
+    Stores a processed result in the session and saves it as a reopenable snapshot
+    of the given operational day.
+    """
+    if global_stats is None:
+        global_stats = calculate_global_stats(data)
+    st.session_state.shift_key = shift_key
+    st.session_state.processed_data = data
+    st.session_state.global_stats = global_stats
+    st.session_state.fleet_summary = build_fleet_summary(data, global_stats)
+    st.session_state.table_index = build_table_index(data)
+    if data.attrs.get('spilled'):
+        st.info("📦 Archivos de gran tamaño: se procesaron por bloques con volcado a disco para no exceder la memoria del servidor.")
+    if save:
+        try:
+            snapshots.save_snapshot(data, global_stats, shift_key, operational_date=operational_date)
+        except Exception as e:
+            st.warning(f"No se pudo guardar el snapshot del día: {e}")
 
 # Configuración de Página Ultra Pro
 st.set_page_config(
@@ -184,6 +249,12 @@ if 'processed_data' not in st.session_state:
     st.session_state.processed_data = None
 if 'global_stats' not in st.session_state:
     st.session_state.global_stats = None
+if 'fleet_summary' not in st.session_state:
+    st.session_state.fleet_summary = None
+if 'shift_key' not in st.session_state:
+    st.session_state.shift_key = None
+if 'table_index' not in st.session_state:
+    st.session_state.table_index = None
 
 # --- Sidebar ---
 with st.sidebar:
@@ -195,7 +266,9 @@ with st.sidebar:
     st.markdown("Analizador Diario de Uso de Autotrac")
     st.divider()
     
-    shift_type = st.radio("Configuración de Turno", ["8 Horas", "12 Horas"], index=0)
+    shift_type = st.radio("Configuración de Turno", ["8 Horas", "12 Horas", "Detección Automática", "Multi-Sitio"], index=0)
+    
+    engine = 'arrow' if st.toggle("⚡ Motor Arrow (menor memoria)", value=False) else 'pandas'
     
     st.subheader("📁 Carga de Archivos")
     
@@ -205,54 +278,139 @@ with st.sidebar:
             f2 = st.file_uploader("Turno 2-10", type=["xlsx"])
             f3 = st.file_uploader("Turno 10-6", type=["xlsx"])
             fa = st.file_uploader("Maestro Alces", type=["xlsx"])
+            speculative = start_speculation('8h', [f1, f2, f3, fa], engine)
+            op_date = operational_date_input([f1, f2, f3])
             
             if st.button("🚀 PROCESAR ANALÍTICA", type="primary", use_container_width=True):
-                if f1 and f2 and f3 and fa:
+                if speculative is not None:
                     with st.spinner("Compilando datos..."):
-                        data, err = process_8h_data(f1, f2, f3, fa)
+                        data, err = speculative.result()
                         if data is not None:
-                            st.session_state.processed_data = data
-                            st.session_state.global_stats = calculate_global_stats(data)
+                            store_results(data, '8h', operational_date=op_date)
                         else:
                             st.error(err)
                 else:
                     st.warning("⚠️ Faltan archivos por cargar.")
 
-        else: # 12 Horas
+        elif shift_type == "12 Horas":
             fam = st.file_uploader("Turno AM", type=["xlsx"])
             fpm = st.file_uploader("Turno PM", type=["xlsx"])
             fa = st.file_uploader("Maestro Alces", type=["xlsx"])
+            speculative = start_speculation('12h', [fam, fpm, fa], engine)
+            op_date = operational_date_input([fam, fpm])
+            
+            if st.button("🚀 PROCESAR ANALÍTICA", type="primary", use_container_width=True):
+                if speculative is not None:
+                    with st.spinner("Compilando datos..."):
+                        data, err = speculative.result()
+                        if data is not None:
+                            store_results(data, '12h', operational_date=op_date)
+                        else:
+                            st.error(err)
+                else:
+                    st.warning("⚠️ Faltan archivos por cargar.")
+
+        elif shift_type == "Detección Automática":
+            uploads = st.file_uploader("Arrastre todos los archivos", type=["xlsx"], accept_multiple_files=True)
+            
+            speculative = None
+            if uploads:
+                detected_shift, routed, upload_report, missing = route_uploads(uploads)
+                st.caption(f"Esquema detectado: **{'8 Horas' if detected_shift == '8h' else '12 Horas'}**")
+                st.dataframe(pd.DataFrame(upload_report), hide_index=True, use_container_width=True)
+                speculative = start_speculation(detected_shift, [routed.get(key) for key in FILE_KEYS[detected_shift]], engine)
+            op_date = operational_date_input([routed.get(key) for key in FILE_KEYS[detected_shift][:-1]] if uploads else [])
             
             if st.button("🚀 PROCESAR ANALÍTICA", type="primary", use_container_width=True):
-                if fam and fpm and fa:
+                if uploads and not missing:
                     with st.spinner("Compilando datos..."):
-                        data, err = process_12h_data(fam, fpm, fa)
+                        data, err = speculative.result()
                         if data is not None:
-                            st.session_state.processed_data = data
-                            st.session_state.global_stats = calculate_global_stats(data)
+                            store_results(data, detected_shift, operational_date=op_date)
                         else:
                             st.error(err)
+                elif uploads:
+                    st.warning(f"⚠️ No se identificaron: {', '.join(missing)}.")
                 else:
                     st.warning("⚠️ Faltan archivos por cargar.")
 
+        else: # Multi-Sitio
+            n_sites = st.number_input("Cantidad de sitios", min_value=2, max_value=10, value=2, step=1)
+            site_bundles = {}
+            site_schemes = set()
+            site_problems = []
+            site_exports = []
+            
+            for i in range(int(n_sites)):
+                site_name = st.text_input(f"Nombre del sitio {i + 1}", value=f"Sitio {i + 1}", key=f"site_name_{i}").strip()
+                site_uploads = st.file_uploader(f"Archivos de {site_name}", type=["xlsx"], accept_multiple_files=True, key=f"site_files_{i}")
+                if not site_uploads:
+                    site_problems.append(f"{site_name}: sin archivos")
+                    continue
+                site_shift, site_routed, _, site_missing = route_uploads(site_uploads)
+                if site_missing:
+                    site_problems.append(f"{site_name}: faltan {', '.join(site_missing)}")
+                    continue
+                site_schemes.add(site_shift)
+                site_bundles[site_name] = site_routed
+                site_exports += [f for key, f in site_routed.items() if key != 'alces']
+            op_date = operational_date_input(site_exports)
+            
+            if st.button("🚀 PROCESAR ANALÍTICA", type="primary", use_container_width=True):
+                if site_problems:
+                    st.warning("⚠️ " + "; ".join(site_problems))
+                elif len(site_bundles) < int(n_sites):
+                    st.warning("⚠️ Los nombres de sitio deben ser únicos.")
+                elif len(site_schemes) > 1:
+                    st.warning("⚠️ Todos los sitios deben usar el mismo esquema de turnos (8h o 12h).")
+                else:
+                    with st.spinner("Procesando sitios en paralelo..."):
+                        site_shift = site_schemes.pop()
+                        data, site_errors = process_sites(site_bundles, site_shift, engine=engine)
+                        for site_name, err in site_errors.items():
+                            st.error(f"{site_name}: {err}")
+                        if data is not None:
+                            store_results(data, site_shift, operational_date=op_date)
+
+    saved_days = snapshots.list_snapshots()
+    if saved_days:
+        with st.expander("📅 Reabrir Día"):
+            saved_labels = {meta['id']: snapshots.snapshot_label(meta) for meta in saved_days}
+            selected_day = st.selectbox("Análisis guardados", list(saved_labels), format_func=saved_labels.get)
+            if st.button("📂 Abrir", use_container_width=True):
+                data, day_stats, meta = load_snapshot(selected_day)
+                store_results(data, meta['shift_type'], day_stats, save=False)
+
     if st.session_state.processed_data is not None:
         if st.sidebar.button("🗑️ Limpiar Datos"):
             st.session_state.processed_data = None
             st.session_state.global_stats = None
+            st.session_state.fleet_summary = None
+            st.session_state.shift_key = None
+            st.session_state.table_index = None
             st.rerun()
 
 # --- Main Dashboard ---
 if st.session_state.processed_data is not None:
     data = st.session_state.processed_data
     stats = st.session_state.global_stats
+    summary = st.session_state.fleet_summary
+    
+    # Multi-sitio: vista consolidada o de un sitio
+    if 'sitio' in data.columns:
+        site_view = st.selectbox("🏭 Sitio", ["Consolidado"] + list(summary['sites']))
+        if site_view != "Consolidado":
+            data = data[data['sitio'] == site_view].drop(columns='sitio')
+            summary = summary['sites'][site_view]
+            stats = summary['shift_breakdown']
     
     st.markdown('<h1 style="font-size: 3.5rem; margin-bottom: 0px;">🚀 Dashboard de Desempeño</h1>', unsafe_allow_html=True)
     st.markdown('<p style="font-size: 1.2rem; color: #64748b; margin-top: 0px; margin-bottom: 2rem;">Análisis de Productividad Operacional y Eficiencia AutoTrac</p>', unsafe_allow_html=True)
     
     # KPIs Row (Custom HTML Cards)
-    total_machines = data['maquina'].nunique()
-    avg_autotrac = stats['autotrac_activo_pct'].mean()
-    total_h = stats['utilizacion_cosecha_h'].sum()
+    total_machines = summary['total_machines']
+    avg_autotrac = summary['avg_autotrac']
+    total_h = summary['total_hours']
     
     st.markdown(f"""
     <div class="metric-container">
@@ -276,7 +434,7 @@ if st.session_state.processed_data is not None:
 
     tab1, tab2 = st.tabs(["📊 Análisis Completo", "📄 Reporte Ejecutivo"])
     
-    st_shift = '8h' if shift_type == "8 Horas" else '12h'
+    st_shift = st.session_state.shift_key
     
     with tab1:
         # Gráfico Global con Insights
@@ -289,9 +447,9 @@ if st.session_state.processed_data is not None:
         st.markdown('<h2 style="color: #1e293b; margin-bottom: 1.5rem;">🌎 Rendimiento Global de la Flota</h2>', unsafe_allow_html=True)
         
         # Insight automático
-        machines_above_target = (data.groupby('maquina')['autotrac_activo_pct'].mean() >= 0.8).sum()
-        total_machines_unique = data['maquina'].nunique()
-        machines_zero = (data.groupby('maquina')['autotrac_activo_pct'].mean() == 0).sum()
+        machines_above_target = summary['machines_above_target']
+        total_machines_unique = summary['total_machines']
+        machines_zero = summary['machines_zero']
         
         col_insight1, col_insight2, col_insight3 = st.columns([2, 1, 1])
         with col_insight1:
@@ -334,7 +492,10 @@ if st.session_state.processed_data is not None:
                 </div>
                 """, unsafe_allow_html=True)
         
-        fig_global = create_global_chart(data, stats, st_shift)
+        if 'sitio' in data.columns:
+            fig_global = create_site_chart(summary['site_stats'], st_shift)
+        else:
+            fig_global = create_global_chart(data, stats, st_shift)
         st.plotly_chart(fig_global, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -347,19 +508,20 @@ if st.session_state.processed_data is not None:
         # Análisis por Zonas (Alces)
         st.markdown('<h2 style="color: #367c39; margin-bottom: 2rem; text-align: center;">📍 Análisis Detallado por Zona</h2>', unsafe_allow_html=True)
         
-        # Filtrar y ordenar alces
-        valid_alces = data['alce'].dropna().unique()
-        alces = sorted([int(a) for a in valid_alces])
+        # Alces ordenados (precalculados)
+        alces = summary['alce_order']
+        if 'sitio' in data.columns:
+            st.info("Seleccione un sitio para ver el detalle por zona.")
         
         # Grid de 2 columnas con insights por alce
         cols = st.columns(2)
         for i, alce in enumerate(alces):
             with cols[i % 2]:
-                # Calcular métricas del alce
-                df_alce = data[data['alce'] == alce]
-                avg_alce = df_alce['autotrac_activo_pct'].mean()
-                machines_in_alce = df_alce['maquina'].nunique()
-                machines_zero_alce = (df_alce.groupby('maquina')['autotrac_activo_pct'].mean() == 0).sum()
+                # Métricas precalculadas del alce
+                alce_stats = summary['alces'][alce]
+                avg_alce = alce_stats['avg']
+                machines_in_alce = alce_stats['machines']
+                machines_zero_alce = alce_stats['machines_zero']
                 
                 # Contenedor con borde prominente
                 border_color = '#27ae60' if avg_alce >= 0.8 else '#e74c3c'
@@ -404,8 +566,8 @@ if st.session_state.processed_data is not None:
                 st.plotly_chart(fig_alce, use_container_width=True)
                 
                 # Mini insight dentro del contenedor
-                best_machine = df_alce.loc[df_alce['autotrac_activo_pct'].idxmax(), 'maquina'] if not df_alce.empty else 'N/A'
-                best_value = df_alce['autotrac_activo_pct'].max() if not df_alce.empty else 0
+                best_machine = alce_stats['best_machine']
+                best_value = alce_stats['best_value']
                 
                 # Detectar si no se usó la tecnología
                 if machines_zero_alce == machines_in_alce:
@@ -440,22 +602,117 @@ if st.session_state.processed_data is not None:
         
         from modules.reporting import generate_pdf
         
+        chart_format = st.radio("Formato de gráficos", ["Vectorial (liviano)", "Imagen PNG"], horizontal=True)
+        chart_mode = 'vector' if chart_format.startswith("Vectorial") else 'raster'
+        chart_dpi = st.slider("Resolución PNG (DPI)", 72, 300, 200, step=8) if chart_mode == 'raster' else 200
+        
         if st.button("📑 GENERAR Y DESCARGAR PDF"):
             try:
                 with st.spinner("Construyendo documento..."):
-                    pdf_bytes = generate_pdf(data, stats, st_shift)
+                    pdf_bytes = generate_pdf(data, stats, st_shift, summary, chart_mode=chart_mode, dpi=chart_dpi)
                     st.download_button(
                         label="📥 Click aquí para guardar PDF",
                         data=pdf_bytes,
-                        file_name=f"Reporte_Productividad_{shift_type.replace(' ', '')}.pdf",
+                        file_name=f"Reporte_Productividad_{'8Horas' if st_shift == '8h' else '12Horas'}.pdf",
                         mime="application/pdf"
                     )
             except Exception as e:
                 st.error(f"Error al generar PDF: {e}")
+        
+        # Versión HTML: mismos textos y gráficos interactivos, pensada para leer en el celular
+        if st.button("🌐 GENERAR REPORTE HTML (rápido)"):
+            try:
+                from modules.html_report import generate_html
+                with st.spinner("Construyendo reporte HTML..."):
+                    html_bytes = generate_html(data, stats, st_shift, summary)
+                    st.download_button(
+                        label="📥 Click aquí para guardar HTML",
+                        data=html_bytes,
+                        file_name=f"Reporte_Productividad_{'8Horas' if st_shift == '8h' else '12Horas'}.html",
+                        mime="text/html"
+                    )
+            except Exception as e:
+                st.error(f"Error al generar HTML: {e}")
         st.markdown('</div>', unsafe_allow_html=True)
 
+    with st.expander("📈 Tendencias Históricas"):
+        # Historial armado con los días guardados (snapshots) del mismo esquema de turnos y tipo de análisis
+        multi_site = 'sitio' in st.session_state.processed_data.columns
+        day_ids = tuple(meta['id'] for meta in snapshots.list_snapshots() if meta['shift_type'] == st_shift)
+        history = load_trend_history(st_shift, multi_site, day_ids)
+        
+        if history['fecha'].nunique() < 2:
+            st.info("Se necesitan al menos 2 días guardados de este esquema de turnos para calcular tendencias.")
+        else:
+            site_key = ['sitio'] if multi_site else []
+            machine_key = site_key + ['maquina']
+            machine_trends = trends.rolling_adoption(history, by=machine_key)
+            dropping = trends.dropping_adoption(machine_trends)
+            
+            trend_level = st.radio("Nivel", ["Flota", "Sitio" if multi_site else "Alce", "Máquina"], horizontal=True, key='trend_level')
+            trend_window = st.radio("Ventana", [7, 14], horizontal=True, format_func=lambda w: f"{w} días", key='trend_window')
+            
+            if trend_level == "Flota":
+                fig_trend = create_trend_chart(trends.rolling_adoption(history, by=()), window=trend_window)
+            elif trend_level == "Máquina":
+                # Por defecto se muestran las máquinas con caída de adopción
+                machine_options = list(machine_trends[machine_key].drop_duplicates().itertuples(index=False, name=None))
+                default_machines = list(dropping[machine_key].itertuples(index=False, name=None))[:5] or machine_options[:5]
+                selected_machines = st.multiselect("Máquinas", machine_options, default=default_machines,
+                                                   format_func=lambda key: ' · '.join(map(str, key)), key='trend_machines')
+                shown = pd.MultiIndex.from_frame(machine_trends[machine_key]).isin(selected_machines)
+                fig_trend = create_trend_chart(machine_trends[shown], machine_key, trend_window)
+            else:
+                group_col = trend_level.lower()
+                fig_trend = create_trend_chart(trends.rolling_adoption(history, by=[group_col]), group_col, trend_window)
+            st.plotly_chart(fig_trend, use_container_width=True)
+            st.plotly_chart(create_shift_delta_chart(trends.shift_deltas(history, st_shift), st_shift), use_container_width=True)
+            
+            if dropping.empty:
+                st.success("✅ Ninguna máquina muestra caída de adopción en los últimos 7 días.")
+            else:
+                st.warning(f"⚠️ {len(dropping)} máquina(s) con caída de adopción de {trends.DROP_THRESHOLD:.0%} o más respecto a la semana anterior.")
+                st.dataframe(
+                    dropping.style.format({'ratio_7d': '{:.1%}', 'ratio_previo': '{:.1%}', 'variacion': '{:+.1%}', 'fecha': '{:%Y-%m-%d}'}),
+                    hide_index=True, use_container_width=True
+                )
+
     with st.expander("📊 Tabla de Datos Procesados"):
-        st.dataframe(data, use_container_width=True)
+        # Filtrado, orden y paginación en el servidor: solo la página visible viaja al navegador
+        full_data = st.session_state.processed_data
+        if st.session_state.table_index is None:
+            st.session_state.table_index = build_table_index(full_data)
+        table_index = st.session_state.table_index
+        
+        table_filters = {}
+        filter_cols = st.columns(4 if 'sitio' in full_data.columns else 3)
+        if 'sitio' in full_data.columns:
+            table_filters['sitio'] = filter_cols[3].multiselect("Sitio", facet_values(table_index, 'sitio'))
+        table_filters['alce'] = filter_cols[0].multiselect("Alce", facet_values(table_index, 'alce'), format_func=lambda a: f"{int(a)}")
+        table_filters['turno'] = filter_cols[1].multiselect("Turno", facet_values(table_index, 'turno'))
+        table_filters['maquina'] = filter_cols[2].multiselect("Máquina", facet_values(table_index, 'maquina'))
+        
+        col_range, col_sort, col_order = st.columns([2, 1, 1])
+        pct_range = col_range.slider("Adopción AutoTrac (%)", 0, 100, (0, 100), step=5)
+        sort_by = col_sort.selectbox("Ordenar por", [c for c in SORT_COLUMNS if c in full_data.columns])
+        ascending = col_order.radio("Orden", ["Ascendente", "Descendente"], horizontal=True) == "Ascendente"
+        
+        col_size, col_page = st.columns(2)
+        page_size = col_size.selectbox("Filas por página", [25, 50, 100, 250], index=1)
+        page = col_page.number_input("Página", min_value=1, value=1, step=1)
+        
+        page_df, total_rows, n_pages = query_table(
+            full_data, table_index, table_filters,
+            (pct_range[0] / 100, pct_range[1] / 100), sort_by, ascending, int(page), page_size
+        )
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
+        first_row = (min(int(page), n_pages) - 1) * page_size + 1 if total_rows else 0
+        st.caption(f"Mostrando {first_row}–{first_row + len(page_df) - 1 if total_rows else 0} de {total_rows} filas · Página {min(int(page), n_pages)} de {n_pages}")
+
+    stage_metrics = st.session_state.processed_data.attrs.get('stage_metrics')
+    if stage_metrics:
+        with st.expander("⏱️ Métricas de Procesamiento"):
+            st.dataframe(pd.DataFrame(stage_metrics).T, use_container_width=True)
 
 else:
     # Pantalla de Bienvenida - Presentación
@@ -0,0 +1,104 @@
+
+"""
+Import-time harness: measures the cold import cost of each app module in a fresh
+interpreter and fails when a module pulls in a heavy dependency at import time.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--budget-ms 1500]
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['streamlit', 'plotly', 'matplotlib', 'fpdf']
+
+# Módulos cuyo propósito es envolver una dependencia pesada: esa no cuenta como regresión
+OWNED_DEPENDENCIES = {
+    'modules.static_charts': ['matplotlib'],
+    'modules.pdf_document': ['fpdf'],
+}
+
+def app_imports(path=os.path.join(ROOT, 'app.py')):
+    """
+    Names of the modules.* modules app.py imports at startup (read from its AST).
+    """
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    found = set()
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == 'modules':
+            found.update(f'modules.{alias.name}' for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and (node.module or '').startswith('modules.'):
+            found.add(node.module)
+        elif isinstance(node, ast.Import):
+            found.update(alias.name for alias in node.names if alias.name.startswith('modules.'))
+    return found
+
+def discover_targets():
+    """
+    Every module app.py imports at startup plus the rest of the modules package, each with
+    the heavy dependencies it must NOT load when imported.
+    """
+    package = {f'modules.{name[:-3]}' for name in os.listdir(os.path.join(ROOT, 'modules'))
+               if name.endswith('.py') and name != '__init__.py'}
+    return {
+        module: [h for h in HEAVY_MODULES if h not in OWNED_DEPENDENCIES.get(module, [])]
+        for module in sorted(app_imports() | package)
+    }
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    'elapsed_ms': elapsed * 1000,
+    'loaded': [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+def measure(module, heavy, runs):
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=heavy)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result['elapsed_ms'])
+        loaded = result['loaded']
+    return statistics.median(samples), loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500.0,
+                        help='Tiempo máximo (mediana) de importación por módulo')
+    args = parser.parse_args()
+
+    failures = []
+    startup = app_imports()
+    print(f"{'Módulo':<26}{'Arranque':>9}{'Mediana (ms)':>14}  Dependencias pesadas cargadas")
+    for module, heavy in discover_targets().items():
+        median_ms, loaded = measure(module, heavy, args.runs)
+        print(f"{module:<26}{'sí' if module in startup else '':>9}{median_ms:>14.1f}  {', '.join(loaded) or '-'}")
+        if loaded:
+            failures.append(f"{module} carga al importarse: {', '.join(loaded)}")
+        if median_ms > args.budget_ms:
+            failures.append(f"{module} supera el presupuesto ({median_ms:.0f} ms > {args.budget_ms:.0f} ms)")
+
+    if failures:
+        print("\nREGRESIÓN DE ARRANQUE:")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
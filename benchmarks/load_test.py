@@ -0,0 +1,160 @@
+
+"""
+Concurrent-session load test: drives app.py headlessly with Streamlit's AppTest, one
+instance per simulated supervisor. Each session uploads synthetic 8h shift files,
+processes them, filters the analysis tab's data table, switches the report's chart format
+and generates the PDF. Latency percentiles per step and memory (this process plus its
+parse workers) are reported for each session count.
+
+Streamlit tabs switch in the browser without a rerun, so the 'explore' step stands in for
+working in the analysis tab: filtering the table reruns the script and queries the server.
+
+Usage:
+    python benchmarks/load_test.py [--sessions 1 2 4 8] [--rows 2000] [--machines 40] [--pdf-mode vector]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Los snapshots de la prueba no deben mezclarse con los reales
+os.environ.setdefault('AUTOTRAC_SNAPSHOT_DIR', tempfile.mkdtemp(prefix='autotrac_load_'))
+
+from pipeline_memory import synthetic_export, synthetic_alces
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+STEPS = ['open', 'upload', 'process', 'explore', 'chart_format', 'pdf']
+PDF_MODES = {'vector': 'Vectorial (liviano)', 'raster': 'Imagen PNG'}
+
+def _rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+def current_rss_mb():
+    """
+    RSS of this process plus all its descendants (the prefetch/parse worker processes).
+    """
+    if not os.path.exists('/proc/self/status'):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    total = 0.0
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        total += _rss_mb(pid)
+        pending += _children(pid)
+    return total
+
+def session_files(seed, rows, machines):
+    shifts = [synthetic_export(rows, machines, seed * 10 + i) for i in range(3)]
+    names = ['Turno 6-2.xlsx', 'Turno 2-10.xlsx', 'Turno 10-6.xlsx']
+    return [(name, content, XLSX) for name, content in zip(names, shifts)] + \
+        [('Maestro Alces.xlsx', synthetic_alces(machines), XLSX)]
+
+def run_session(files, timings, errors, timeout, pdf_mode):
+    from streamlit.testing.v1 import AppTest
+
+    def timed(step, action):
+        start = time.perf_counter()
+        action()
+        timings[step].append(time.perf_counter() - start)
+
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=timeout)
+        timed('open', at.run)
+
+        def upload():
+            for uploader, file in zip(at.sidebar.file_uploader, files):
+                uploader.set_value(file)
+            at.run()
+        timed('upload', upload)
+
+        timed('process', lambda: next(b for b in at.sidebar.button if 'PROCESAR' in b.label).click().run())
+
+        def explore():
+            alce_filter = next(m for m in at.main.multiselect if m.label == 'Alce')
+            alce_filter.set_value(alce_filter.options[:1]).run()
+        timed('explore', explore)
+        timed('chart_format', lambda: next(r for r in at.main.radio if r.label == 'Formato de gráficos')
+              .set_value(PDF_MODES[pdf_mode]).run())
+        timed('pdf', lambda: next(b for b in at.main.button if 'PDF' in b.label).click().run())
+
+        if at.exception:
+            errors.append(str(at.exception[0].message))
+    except Exception as e:
+        errors.append(repr(e))
+
+def percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--rows', type=int, default=2000, help='Filas por archivo de turno')
+    parser.add_argument('--machines', type=int, default=40)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--pdf-mode', choices=list(PDF_MODES), default='vector')
+    args = parser.parse_args()
+
+    print(f"Snapshots de prueba en {os.environ['AUTOTRAC_SNAPSHOT_DIR']}")
+    seed = 0
+    for n_sessions in args.sessions:
+        # Archivos distintos por sesión: sin aciertos de caché entre supervisores
+        bundles = []
+        for _ in range(n_sessions):
+            bundles.append(session_files(seed, args.rows, args.machines))
+            seed += 1
+
+        timings = defaultdict(list)
+        errors = []
+        rss_before = current_rss_mb()
+        rss_peak = rss_before
+        threads = [threading.Thread(target=run_session, args=(files, timings, errors, args.timeout, args.pdf_mode)) for files in bundles]
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            rss_peak = max(rss_peak, current_rss_mb())
+            time.sleep(0.05)
+        wall = time.perf_counter() - start
+
+        print(f"\n=== {n_sessions} sesión(es) concurrentes: {wall:.1f} s, "
+              f"RSS +{rss_peak - rss_before:.0f} MB pico ({(rss_peak - rss_before) / n_sessions:.0f} MB/sesión) ===")
+        print(f"{'Paso':<14}{'p50 (s)':>10}{'p90 (s)':>10}{'p99 (s)':>10}{'max (s)':>10}")
+        for step in STEPS:
+            values = sorted(timings[step])
+            if not values:
+                continue
+            print(f"{step:<14}{percentile(values, 50):>10.2f}{percentile(values, 90):>10.2f}"
+                  f"{percentile(values, 99):>10.2f}{values[-1]:>10.2f}")
+        for error in errors:
+            print(f"ERROR: {error}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from modules.processing import FILE_KEYS
+
+def run_processing(shift_type, files):
+    """
+    Worker task: parses the shift exports and builds the fleet summary.
+    Runs inside the process pool, so it only receives and returns picklable data.
+    """
+    from modules.processing import process_8h_data, process_12h_data, calculate_global_stats, build_fleet_summary
+
+    # El trabajo ya corre en un proceso del pool: lectura secuencial
+    buffers = [io.BytesIO(files[key]) for key in FILE_KEYS[shift_type]]
+    if shift_type == '8h':
+        data, err = process_8h_data(*buffers, parse_workers=0)
+    else:
+        data, err = process_12h_data(*buffers, parse_workers=0)
+
+    if data is None:
+        return None, err
+
+    stats = calculate_global_stats(data)
+    return {
+        'data': data,
+        'stats': stats,
+        'summary': build_fleet_summary(data, stats),
+    }, None
+
+def run_report(data, stats, shift_type, summary):
+    """
+    Worker task: renders the PDF report for an already processed job.
+    """
+    from modules.reporting import generate_pdf
+    return bytes(generate_pdf(data, stats, shift_type, summary))
+
+def _json_value(value):
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def summary_to_json(summary, data):
+    """
+    Converts the fleet summary and processed rows into JSON-safe structures.
+    """
+    return {
+        'total_machines': _json_value(summary['total_machines']),
+        'avg_autotrac': _json_value(summary['avg_autotrac']),
+        'total_hours': _json_value(summary['total_hours']),
+        'machines_above_target': summary['machines_above_target'],
+        'machines_zero': summary['machines_zero'],
+        'machine_means': {str(k): _json_value(v) for k, v in summary['machine_means'].items()},
+        'shifts': [
+            {k: _json_value(v) for k, v in row.items()}
+            for row in summary['shift_breakdown'].to_dict(orient='records')
+        ],
+        'alces': {
+            str(alce): {k: _json_value(v) for k, v in alce_stats.items()}
+            for alce, alce_stats in summary['alces'].items()
+        },
+        'rows': [
+            {k: _json_value(v) for k, v in row.items()}
+            for row in data.to_dict(orient='records')
+        ],
+    }
+
+class JobManager:
+    """
+    Tracks submitted jobs, runs them on a bounded process pool and caches results.
+    Identical uploads map to the same job, so repeated requests are served from cache.
+    """
+
+    def __init__(self, max_workers=2, max_cached_jobs=32):
+        self.max_workers = max_workers
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.max_cached_jobs = max_cached_jobs
+        self.jobs = OrderedDict()
+        self.by_fingerprint = {}
+        self.lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        """
+        Submits to the pool (call with self.lock held). A pool left broken by a crashed or
+        OOM-killed worker is replaced once; BrokenProcessPool propagates if the new one fails too.
+        """
+        try:
+            return self.executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.executor.submit(fn, *args)
+
+    @staticmethod
+    def _crashed(future):
+        return future.done() and not future.cancelled() and isinstance(future.exception(), BrokenProcessPool)
+
+    def submit(self, shift_type, files):
+        digest = hashlib.sha256(shift_type.encode())
+        for key in FILE_KEYS[shift_type]:
+            digest.update(hashlib.sha256(files[key]).digest())
+        fingerprint = digest.hexdigest()
+
+        with self.lock:
+            job_id = self.by_fingerprint.get(fingerprint)
+            # Un trabajo perdido por la caída de un worker se vuelve a lanzar
+            if job_id in self.jobs and not self._crashed(self.jobs[job_id]['future']):
+                self.jobs.move_to_end(job_id)
+                return job_id
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'shift_type': shift_type,
+                'fingerprint': fingerprint,
+                'future': self._submit(run_processing, shift_type, files),
+                'metrics': None,
+                'report': None,
+            }
+            self.by_fingerprint[fingerprint] = job_id
+            self._evict()
+            return job_id
+
+    def _evict(self):
+        while len(self.jobs) > self.max_cached_jobs:
+            _, job = self.jobs.popitem(last=False)
+            self.by_fingerprint.pop(job['fingerprint'], None)
+            job['future'].cancel()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def status(self, job):
+        future = job['future']
+        if not future.done():
+            return {'status': 'running' if future.running() else 'queued'}
+        if future.exception() is not None:
+            return {'status': 'error', 'error': str(future.exception())}
+        result, err = future.result()
+        if result is None:
+            return {'status': 'error', 'error': err}
+        return {'status': 'done'}
+
+    def metrics(self, job):
+        if job['metrics'] is None:
+            result, _ = job['future'].result()
+            job['metrics'] = json.dumps(summary_to_json(result['summary'], result['data'])).encode('utf-8')
+        return job['metrics']
+
+    def report(self, job):
+        with self.lock:
+            if job['report'] is None or self._crashed(job['report']):
+                result, _ = job['future'].result()
+                job['report'] = self._submit(
+                    run_report, result['data'], result['stats'], job['shift_type'], result['summary']
+                )
+            report = job['report']
+        return report.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class APIHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+        POST /jobs                  -> {"job_id": ...}
+        GET  /jobs/<id>             -> {"status": "queued|running|done|error"}
+        GET  /jobs/<id>/metrics     -> métricas de adopción en JSON
+        GET  /jobs/<id>/report.pdf  -> bytes del informe PDF
+    """
+    manager = None
+
+    def _send(self, code, body, content_type='application/json'):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/jobs':
+            return self._send(404, {'error': 'Ruta no encontrada'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length))
+            shift_type = payload.get('shift_type')
+            if shift_type not in FILE_KEYS:
+                return self._send(400, {'error': "shift_type debe ser '8h' o '12h'"})
+            missing = [key for key in FILE_KEYS[shift_type] if key not in payload.get('files', {})]
+            if missing:
+                return self._send(400, {'error': f"Faltan archivos: {', '.join(missing)}"})
+            files = {key: base64.b64decode(payload['files'][key]) for key in FILE_KEYS[shift_type]}
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._send(400, {'error': f"Solicitud inválida: {e}"})
+
+        try:
+            job_id = self.manager.submit(shift_type, files)
+        except BrokenProcessPool as e:
+            return self._send(503, {'error': f"Servicio de procesamiento no disponible: {e}"})
+        self._send(202, {'job_id': job_id})
+
+    def do_GET(self):
+        parts = [p for p in urlparse(self.path).path.split('/') if p]
+        if len(parts) < 2 or parts[0] != 'jobs':
+            return self._send(404, {'error': 'Ruta no encontrada'})
+
+        job = self.manager.get(parts[1])
+        if job is None:
+            return self._send(404, {'error': 'Trabajo no encontrado'})
+
+        status = self.manager.status(job)
+        if len(parts) == 2:
+            return self._send(200, status)
+
+        if status['status'] != 'done':
+            return self._send(409, status)
+
+        if parts[2] == 'metrics':
+            return self._send(200, self.manager.metrics(job))
+        if parts[2] == 'report.pdf':
+            try:
+                pdf_bytes = self.manager.report(job)
+            except Exception as e:
+                return self._send(500, {'error': f"Error al generar PDF: {e}"})
+            return self._send(200, pdf_bytes, content_type='application/pdf')
+
+        self._send(404, {'error': 'Ruta no encontrada'})
+
+def main():
+    parser = argparse.ArgumentParser(description='API local de procesamiento AutoTrac')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--cache-size', type=int, default=32)
+    args = parser.parse_args()
+
+    APIHandler.manager = JobManager(max_workers=args.workers, max_cached_jobs=args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), APIHandler)
+    print(f"API escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        APIHandler.manager.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+
+import numpy as np
+
+FACET_COLUMNS = ['sitio', 'alce', 'turno', 'maquina']
+SORT_COLUMNS = ['maquina', 'turno', 'alce', 'autotrac_activo_pct', 'autotrac_activo_h', 'utilizacion_cosecha_h']
+
+def build_table_index(df):
+    """
+    Precomputes the row positions of every facet value and the sort order of each sortable
+    column, so filtering, sorting and paging never rescan the processed frame.
+    """
+    index = {'n_rows': len(df), 'facets': {}, 'order': {}}
+
+    for col in FACET_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        index['facets'][col] = {
+            key: np.asarray(positions)
+            for key, positions in values.groupby(values, sort=True).indices.items()
+        }
+
+    for col in SORT_COLUMNS:
+        if col in df.columns:
+            ordered = df[col].reset_index(drop=True).sort_values(kind='stable', na_position='last')
+            index['order'][col] = ordered.index.to_numpy()
+
+    index['pct'] = df['autotrac_activo_pct'].to_numpy(dtype=float, na_value=np.nan)
+    return index
+
+def facet_values(index, col):
+    return list(index['facets'].get(col, {}))
+
+def query_table(df, index, filters=None, pct_range=None, sort_by='maquina', ascending=True, page=1, page_size=50):
+    """
+    Applies the facet filters ({col: [values]}) and the adoption range against the index,
+    then returns only the requested page: (page_df, total_rows, n_pages).
+    """
+    mask = np.ones(index['n_rows'], dtype=bool)
+
+    for col, selected in (filters or {}).items():
+        if not selected or col not in index['facets']:
+            continue
+        col_mask = np.zeros(index['n_rows'], dtype=bool)
+        for value in selected:
+            col_mask[index['facets'][col].get(value, [])] = True
+        mask &= col_mask
+
+    # Rango completo = sin filtro (conserva filas sin porcentaje)
+    if pct_range is not None and tuple(pct_range) != (0, 1):
+        low, high = pct_range
+        mask &= (index['pct'] >= low) & (index['pct'] <= high)
+
+    order = index['order'].get(sort_by, np.arange(index['n_rows']))
+    if not ascending:
+        order = order[::-1]
+    positions = order[mask[order]]
+
+    total = len(positions)
+    n_pages = max(1, -(-total // page_size))
+    page = min(max(page, 1), n_pages)
+    start = (page - 1) * page_size
+    return df.iloc[positions[start:start + page_size]], total, n_pages
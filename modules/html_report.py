@@ -0,0 +1,101 @@
+
+import datetime
+import html
+
+from modules.processing import build_fleet_summary
+from modules.reporting import executive_summary_text, site_insight_text, alce_insight_text, alce_recommendation_text
+from modules.visualization import create_global_chart, create_alce_chart, create_site_chart
+
+STYLE = """
+body { font-family: -apple-system, 'Segoe UI', Roboto, Arial, sans-serif; margin: 0; background: #f4f6f8; color: #1e293b; }
+header { background: #367c39; color: white; padding: 1.2rem 1rem; }
+header h1 { margin: 0; font-size: 1.4rem; }
+header p { margin: 0.3rem 0 0; opacity: 0.85; font-size: 0.9rem; }
+main { max-width: 1100px; margin: 0 auto; padding: 0.5rem; }
+section { background: white; border-radius: 12px; padding: 1rem; margin: 0.8rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.06); }
+h2 { color: #367c39; font-size: 1.2rem; margin: 0 0 0.6rem; border-bottom: 2px solid #367c39; padding-bottom: 0.3rem; }
+.kpis { display: flex; flex-wrap: wrap; gap: 0.5rem; }
+.kpi { flex: 1 1 140px; background: #f8fafc; border-radius: 8px; padding: 0.6rem; text-align: center; }
+.kpi b { display: block; font-size: 1.4rem; }
+.text { white-space: pre-line; line-height: 1.5; }
+.rec { color: #367c39; font-weight: 600; margin-top: 0.6rem; }
+"""
+
+def _paragraph(text, css='text'):
+    return f'<div class="{css}">{html.escape(text)}</div>'
+
+def _figure(fig):
+    # El bundle de Plotly se incluye una sola vez en <head>
+    return fig.to_html(full_html=False, include_plotlyjs=False, config={'responsive': True, 'displaylogo': False},
+                       default_height=420, default_width='100%')
+
+def _alce_sections(processed_data, summary, shift_type, title_prefix=''):
+    sections = []
+    for alce in summary['alce_order']:
+        alce_stats = summary['alces'][alce]
+        parts = [
+            f'<h2>{html.escape(title_prefix)}Alce: {alce}</h2>',
+            _paragraph(alce_insight_text(alce, alce_stats)),
+        ]
+        fig = create_alce_chart(processed_data, alce, shift_type)
+        if fig is not None:
+            parts.append(_figure(fig))
+        parts.append('<div class="rec">Recomendaciones:</div>')
+        parts.append(_paragraph(alce_recommendation_text(alce, alce_stats)))
+        sections.append(f'<section>{"".join(parts)}</section>')
+    return sections
+
+def generate_html(processed_data, global_stats, shift_type, summary=None):
+    """
+    Builds the executive report as a single self-contained HTML file (returned as bytes):
+    the dashboard's Plotly figures plus the same insight texts as generate_pdf.
+    """
+    from plotly.offline import get_plotlyjs
+
+    if summary is None:
+        summary = build_fleet_summary(processed_data, global_stats)
+
+    kpis = [
+        ('Máquinas', f"{summary['total_machines']}"),
+        ('Promedio AutoTrac', f"{summary['avg_autotrac']:.1%}"),
+        ('Sobre la meta', f"{summary['machines_above_target']}"),
+        ('Sin uso', f"{summary['machines_zero']}"),
+        ('Horas de cosecha', f"{summary['total_hours']:,.0f}"),
+    ]
+    sections = [
+        '<section><h2>Resumen Ejecutivo</h2><div class="kpis">'
+        + ''.join(f'<div class="kpi"><b>{value}</b>{label}</div>' for label, value in kpis)
+        + '</div>' + _paragraph(executive_summary_text(processed_data, summary)) + '</section>'
+    ]
+
+    if 'sitio' not in processed_data.columns:
+        sections.append(f'<section><h2>Visión Global de la Flota</h2>{_figure(create_global_chart(processed_data, global_stats, shift_type))}</section>')
+        sections += _alce_sections(processed_data, summary, shift_type)
+    else:
+        # Multi-sitio: comparación entre sitios y un capítulo por sitio
+        sections.append(f'<section><h2>Visión Global de la Flota</h2>{_figure(create_site_chart(summary["site_stats"], shift_type))}</section>')
+        for sitio, site_summary in summary['sites'].items():
+            df_site = processed_data[processed_data['sitio'] == sitio].drop(columns='sitio')
+            fig = create_global_chart(df_site, site_summary['shift_breakdown'], shift_type)
+            fig.update_layout(title=f'Desempeño por Máquina - {sitio}')
+            sections.append(f'<section><h2>Sitio: {html.escape(sitio)}</h2>{_paragraph(site_insight_text(sitio, site_summary))}{_figure(fig)}</section>')
+            sections += _alce_sections(df_site, site_summary, shift_type, title_prefix=f'{sitio} - ')
+
+    page = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Informe de Productividad - AutoTrac</title>
+<style>{STYLE}</style>
+<script type="text/javascript">{get_plotlyjs()}</script>
+</head>
+<body>
+<header><h1>Informe de Productividad</h1><p>Análisis de Uso de AutoTrac™ · Fecha: {datetime.date.today()}</p></header>
+<main>
+{''.join(sections)}
+</main>
+</body>
+</html>
+"""
+    return page.encode('utf-8')
@@ -0,0 +1,192 @@
+
+import datetime
+import os
+import re
+from collections import Counter
+
+from modules.processing import FILE_KEYS
+from modules.schema import clean_header, missing_targets
+from modules.snapshots import DAY_START_HOUR
+
+PEEK_ROWS = 5
+
+NAME_DATE = re.compile(r'(?<!\d)(\d{4})[-_.](\d{2})[-_.](\d{2})(?!\d)')
+
+# Patrones de nombre de archivo por rol (sin dígitos adyacentes para no confundir fechas)
+NAME_PATTERNS = {
+    'turno_6_2': re.compile(r'(?<!\d)6\s*[-_a ]\s*2(?!\d)'),
+    'turno_2_10': re.compile(r'(?<!\d)2\s*[-_a ]\s*10(?!\d)'),
+    'turno_10_6': re.compile(r'(?<!\d)10\s*[-_a ]\s*6(?!\d)'),
+    'turno_am': re.compile(r'(?<![a-z])(am|dia|día|diurno)(?![a-z])'),
+    'turno_pm': re.compile(r'(?<![a-z])(pm|noche|nocturno)(?![a-z])'),
+}
+
+ROLE_LABELS = {
+    'turno_6_2': 'Turno 6-2',
+    'turno_2_10': 'Turno 2-10',
+    'turno_10_6': 'Turno 10-6',
+    'turno_am': 'Turno AM',
+    'turno_pm': 'Turno PM',
+    'alces': 'Maestro Alces',
+}
+
+def peek_upload(file, nrows=PEEK_ROWS):
+    """
+    Reads only the sheet metadata and first rows of an Excel upload.
+    The file position is restored so the full parse can reuse the same object.
+    """
+    from openpyxl import load_workbook
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = []
+        for row in ws.iter_rows(max_row=nrows + 1, values_only=True):
+            rows.append(list(row))
+        peek = {
+            'sheets': wb.sheetnames,
+            'n_rows': ws.max_row,
+            'header': [clean_header(c) for c in rows[0] if c is not None] if rows else [],
+            'rows': rows[1:],
+        }
+    finally:
+        wb.close()
+        if hasattr(file, 'seek'):
+            file.seek(0)
+    return peek
+
+def _shift_from_times(peek):
+    """
+    Guesses the shift from the hour of the first timestamp in the peeked rows.
+    Returns (8h role, 12h role) or None when no timestamp is available.
+    """
+    for row in peek['rows']:
+        for value in row:
+            if isinstance(value, datetime.datetime) and (value.hour or value.minute):
+                hour = value.hour
+                role_8h = 'turno_6_2' if 6 <= hour < 14 else 'turno_2_10' if 14 <= hour < 22 else 'turno_10_6'
+                role_12h = 'turno_am' if 6 <= hour < 18 else 'turno_pm'
+                return role_8h, role_12h
+    return None
+
+def _operational_day(peek):
+    """
+    Operational day of the first timestamp in the peeked rows. Plain dates (midnight)
+    are taken as the day itself. Returns None when the rows carry no dates.
+    """
+    for row in peek['rows']:
+        for value in row:
+            if isinstance(value, datetime.datetime):
+                if value.hour or value.minute:
+                    return (value - datetime.timedelta(hours=DAY_START_HOUR)).date()
+                return value.date()
+            if isinstance(value, datetime.date):
+                return value
+    return None
+
+def _date_from_name(name):
+    match = NAME_DATE.search(os.path.basename(name))
+    if not match:
+        return None
+    try:
+        return datetime.date(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+def detect_operational_date(files):
+    """
+    Guesses the operational day of a set of exports from the first timestamp of each
+    file, or else from a YYYY-MM-DD date in its name. Returns the most common day,
+    or None when no file carries a date.
+    """
+    days = []
+    for f in files:
+        try:
+            day = _operational_day(peek_upload(f))
+        except Exception:
+            day = None
+        day = day or _date_from_name(getattr(f, 'name', str(f)))
+        if day is not None:
+            days.append(day)
+    return Counter(days).most_common(1)[0][0] if days else None
+
+def classify_upload(name, peek):
+    """
+    Classifies an upload as Alces master or shift export from its header,
+    and proposes the shift role from its file name, sheet names or first timestamps.
+    """
+    # Mismas reglas de encabezados que el pipeline (modules.schema)
+    header = peek['header']
+    is_shift = not missing_targets('shift', header)
+    has_alce = not missing_targets('alces', header) or any('alce' in s.lower() for s in peek['sheets'])
+
+    if not is_shift:
+        return {'kind': 'alces' if has_alce else None, 'role': 'alces' if has_alce else None}
+
+    text = ' '.join([os.path.splitext(name)[0]] + peek['sheets']).lower()
+    candidates = [role for role, pattern in NAME_PATTERNS.items() if pattern.search(text)]
+    if len(candidates) == 1:
+        return {'kind': 'shift', 'role': candidates[0]}
+
+    times = _shift_from_times(peek)
+    return {'kind': 'shift', 'role': None, 'time_hint': times}
+
+def route_uploads(files):
+    """
+    Peeks every upload and assigns it to a file role.
+    Returns the detected shift scheme ('8h'/'12h'), the routed files by role,
+    a report per file and the labels of the roles still missing.
+    """
+    report = []
+    routed = {}
+    pending = []
+
+    for f in files:
+        name = getattr(f, 'name', str(f))
+        try:
+            peek = peek_upload(f)
+        except Exception as e:
+            report.append({'archivo': name, 'rol': None, 'filas': None, 'detalle': f"No se pudo leer: {e}"})
+            continue
+
+        result = classify_upload(name, peek)
+        entry = {'archivo': name, 'rol': result['role'], 'filas': max((peek['n_rows'] or 1) - 1, 0), 'detalle': ''}
+        if result['kind'] is None:
+            entry['detalle'] = 'Encabezados no reconocidos'
+        elif result['role'] is None:
+            pending.append((f, entry, result.get('time_hint')))
+        elif result['role'] in routed:
+            entry['detalle'] = f"Duplicado: {ROLE_LABELS[result['role']]} ya asignado"
+            entry['rol'] = None
+        else:
+            routed[result['role']] = f
+        report.append(entry)
+
+    # Esquema: por roles ya identificados, o por cantidad de exportaciones de turno
+    n_shift_files = sum(1 for role in routed if role != 'alces') + len(pending)
+    if any(role in routed for role in ('turno_am', 'turno_pm')):
+        shift_type = '12h'
+    elif any(role in routed for role in FILE_KEYS['8h'][:-1]):
+        shift_type = '8h'
+    else:
+        shift_type = '12h' if n_shift_files == 2 else '8h'
+
+    # Archivos sin rol por nombre: usar la hora de los primeros registros
+    for f, entry, time_hint in pending:
+        role = None
+        if time_hint is not None:
+            role = time_hint[0] if shift_type == '8h' else time_hint[1]
+        if role is None or role in routed:
+            entry['detalle'] = 'No se pudo determinar el turno'
+            continue
+        routed[role] = f
+        entry['rol'] = role
+        entry['detalle'] = 'Turno inferido por hora de registro'
+
+    for entry in report:
+        entry['rol'] = ROLE_LABELS.get(entry['rol'], '—')
+
+    missing = [ROLE_LABELS[key] for key in FILE_KEYS[shift_type] if key not in routed]
+    return shift_type, routed, report, missing
@@ -0,0 +1,147 @@
+
+import atexit
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+import pandas as pd
+
+# Presupuesto de memoria por trabajo (todos los archivos de un análisis)
+MEMORY_BUDGET_MB = float(os.environ.get('AUTOTRAC_MEMORY_BUDGET_MB', 1024))
+
+# Pico medido de pd.read_excel (openpyxl) por celda, y celdas por byte del .xlsx comprimido
+BYTES_PER_CELL = 100
+XLSX_BYTES_PER_CELL = 8
+SPILL_CHUNK_ROWS = 50_000
+
+_spill_dir = None
+
+def _source(f):
+    if isinstance(f, (bytes, bytearray)):
+        return io.BytesIO(f)
+    if hasattr(f, 'seek'):
+        f.seek(0)
+    return f
+
+def _file_size(f):
+    if isinstance(f, (bytes, bytearray)):
+        return len(f)
+    if hasattr(f, 'getbuffer'):
+        return f.getbuffer().nbytes
+    if hasattr(f, 'seek'):
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(0)
+        return size
+    return os.path.getsize(f)
+
+def _sheet_cells(f):
+    """
+    Reads the <dimension> tag at the start of the first worksheet inside the .xlsx zip,
+    without loading the workbook or its shared strings. Returns 0 when it is missing.
+    """
+    from openpyxl.utils.cell import range_boundaries
+
+    with zipfile.ZipFile(_source(f)) as z:
+        sheets = [n for n in z.namelist() if re.fullmatch(r'xl/worksheets/sheet\d+\.xml', n)]
+        if not sheets:
+            return 0
+        first = min(sheets, key=lambda n: int(re.search(r'\d+', n).group()))
+        with z.open(first) as sheet:
+            head = sheet.read(4096).decode('utf-8', 'ignore')
+
+    match = re.search(r'<(?:\w+:)?dimension ref="([A-Z]+\d+(?::[A-Z]+\d+)?)"', head)
+    if not match:
+        return 0
+    min_col, min_row, max_col, max_row = range_boundaries(match.group(1))
+    return (max_row - min_row + 1) * (max_col - min_col + 1)
+
+def estimate_excel_mb(f):
+    """
+    Estimates the memory pd.read_excel needs for the first sheet, from the sheet's
+    dimension metadata (no rows are parsed). Falls back to the compressed size when
+    the exporter did not write the dimension.
+    """
+    try:
+        cells = _sheet_cells(f)
+    except Exception:
+        cells = 0
+    finally:
+        if hasattr(f, 'seek'):
+            f.seek(0)
+
+    if not cells:
+        cells = _file_size(f) / XLSX_BYTES_PER_CELL
+    return cells * BYTES_PER_CELL / 1e6
+
+def over_budget(files, budget_mb=None):
+    """
+    Returns (estimated_mb, exceeded) for a job made of the given Excel files.
+    """
+    budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    estimated = sum(estimate_excel_mb(f) for f in files)
+    return estimated, estimated > budget_mb
+
+def _get_spill_dir():
+    global _spill_dir
+    if _spill_dir is None:
+        _spill_dir = tempfile.mkdtemp(prefix='autotrac_spill_')
+        atexit.register(shutil.rmtree, _spill_dir, True)
+    return _spill_dir
+
+def _coerce(column, kind):
+    if kind == 'float':
+        return pd.to_numeric(pd.Series(column, dtype=object), errors='coerce').to_numpy(dtype=float)
+    return [None if v is None else str(v) for v in column]
+
+def read_excel_spilled(f, resolve_columns, chunk_rows=SPILL_CHUNK_ROWS):
+    """
+    Streams the first sheet in chunks of rows, keeping only the columns returned by
+    resolve_columns(raw_header) -> {position: (name, 'str' | 'float')}.
+    Chunks are written to an Arrow IPC file on disk and the result is memory-mapped,
+    so neither the whole sheet nor the projected columns live on the Python heap.
+    """
+    import pyarrow as pa
+    from openpyxl import load_workbook
+
+    wb = load_workbook(_source(f), read_only=True, data_only=True)
+    path = os.path.join(_get_spill_dir(), f'{os.getpid()}_{id(wb)}.arrow')
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = resolve_columns(list(header))
+
+        schema = pa.schema([(name, pa.float64() if kind == 'float' else pa.string()) for name, kind in columns.values()])
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == chunk_rows:
+                    _write_chunk(writer, schema, columns, chunk)
+                    chunk = []
+            if chunk:
+                _write_chunk(writer, schema, columns, chunk)
+    finally:
+        wb.close()
+        if hasattr(f, 'seek'):
+            f.seek(0)
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    try:
+        # El mapeo sigue válido tras borrar el archivo (POSIX); en Windows se limpia al salir
+        os.unlink(path)
+    except OSError:
+        pass
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def _write_chunk(writer, schema, columns, chunk):
+    import pyarrow as pa
+
+    arrays = []
+    for position, (name, kind) in columns.items():
+        values = [row[position] if position < len(row) else None for row in chunk]
+        arrays.append(pa.array(_coerce(values, kind), type=schema.field(name).type, from_pandas=True))
+    writer.write_batch(pa.record_batch(arrays, schema=schema))
@@ -0,0 +1,47 @@
+
+import math
+
+from fpdf import FPDF
+
+class ProfessionalPDF(FPDF):
+    def header(self):
+        # Logo placeholder (if file existed, we'd add it)
+        # self.image('logo.png', 10, 8, 33)
+        self.set_font('Arial', 'B', 10)
+        self.set_text_color(120, 120, 120)
+        self.cell(0, 10, 'Informe de Productividad - Análisis AutoTrac(TM)', 0, 1, 'R')
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128)
+        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    def chapter_title(self, title):
+        self.set_font('Arial', 'B', 16)
+        self.set_text_color(54, 124, 57) # Deere Green
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.ln(4)
+        self.set_draw_color(54, 124, 57)
+        self.line(10, self.get_y(), 200, self.get_y())
+        self.ln(10)
+
+    def chapter_body(self, body):
+        self.set_font('Arial', '', 11)
+        self.set_text_color(0)
+        self.multi_cell(0, 6, body)
+        self.ln()
+
+    def rotated_text(self, x, y, txt, angle):
+        """
+        Writes text rotated counter-clockwise by `angle` degrees around (x, y).
+        """
+        a = math.radians(angle)
+        c, s = math.cos(a), math.sin(a)
+        op = 'BT %.3f %.3f %.3f %.3f %.2f %.2f Tm (%s) Tj ET' % (
+            c, s, -s, c, x * self.k, (self.h - y) * self.k, self._escape(self.normalize_text(txt))
+        )
+        if self.color_flag:
+            op = 'q ' + self.text_color + ' ' + op + ' Q'
+        self._out(op)
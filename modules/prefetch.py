@@ -0,0 +1,136 @@
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.memory_guard import MEMORY_BUDGET_MB, estimate_excel_mb
+from modules.processing import (FILE_KEYS, _file_bytes, _read_excel_bytes, parse_in_worker, submit_parse,
+                                read_excel_spilled, shift_spill_columns, alces_spill_columns,
+                                process_8h_frames, process_12h_frames)
+from modules.profiling import stage
+
+# Resultados especulativos compartidos por todas las sesiones, por contenido de archivo.
+# Los exportes parseados (pesados) se acotan por memoria estimada y se sueltan al terminar su trabajo;
+# los resultados agregados (livianos) por cantidad.
+PARSED_CACHE_MB = float(os.environ.get('AUTOTRAC_PREFETCH_CACHE_MB', MEMORY_BUDGET_MB))
+MAX_RESULTS = 64
+PROCESSORS = {'8h': process_8h_frames, '12h': process_12h_frames}
+
+_lock = threading.Lock()
+_job_pool = None
+_parsed = OrderedDict()  # (digest, engine) -> (future, estimated_mb)
+_parsed_mb = 0.0
+_results = OrderedDict()
+
+def _job_executor():
+    global _job_pool
+    with _lock:
+        if _job_pool is None:
+            _job_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch')
+    return _job_pool
+
+def _evict_parsed():
+    # Llamar con _lock tomado. Un parseo en curso no se descarta: su trabajo lo sigue esperando
+    global _parsed_mb
+    while _parsed_mb > PARSED_CACHE_MB and _parsed:
+        oldest = next(iter(_parsed))
+        if not _parsed[oldest][0].done():
+            break
+        _parsed_mb -= _parsed.pop(oldest)[1]
+
+def _forget_parsed(keys):
+    global _parsed_mb
+    with _lock:
+        for key in keys:
+            if key in _parsed:
+                _parsed_mb -= _parsed.pop(key)[1]
+
+def _settle(job_key, keys, parse_futures, future):
+    _forget_parsed(keys)
+    # Un fallo del pool (worker caído) no es un resultado: el próximo intento vuelve a procesar
+    if any(f.done() and not f.cancelled() and isinstance(f.exception(), BrokenProcessPool) for f in parse_futures):
+        with _lock:
+            if _results.get(job_key) is future:
+                _results.pop(job_key)
+
+def _remember_result(key, future):
+    _results[key] = future
+    _results.move_to_end(key)
+    while len(_results) > MAX_RESULTS:
+        oldest = next(iter(_results))
+        if not _results[oldest].done():
+            break
+        _results.pop(oldest)
+
+def _digest(content, engine):
+    return hashlib.sha256(content).hexdigest(), engine
+
+def prefetch_file(f, engine='pandas', shift_type=None, role=None):
+    """
+    Starts parsing an uploaded export in a worker process; returns (content_digest, future).
+    The same content is parsed only once, whatever session uploads it, while its job runs.
+    Given its scheme and role, a file estimated above its share of the memory budget
+    is read through the disk-spilling path.
+    """
+    content = _file_bytes(f)
+    return _prefetch(content, _digest(content, engine), shift_type, role)
+
+def _prefetch(content, key, shift_type, role):
+    global _parsed_mb
+    with _lock:
+        if key in _parsed:
+            _parsed.move_to_end(key)
+            return key[0], _parsed[key][0]
+    estimated_mb = estimate_excel_mb(content)
+    try:
+        if role is not None and estimated_mb > MEMORY_BUDGET_MB / len(FILE_KEYS[shift_type]):
+            resolver = alces_spill_columns if role == 'alces' else shift_spill_columns
+            future = submit_parse(parse_in_worker, read_excel_spilled, content, resolver)
+        else:
+            future = submit_parse(parse_in_worker, _read_excel_bytes, content,
+                                  'pyarrow' if key[1] == 'arrow' else 'numpy_nullable')
+    except Exception as e:
+        # Sin pool utilizable: el trabajo termina con (None, err) y el archivo no queda en caché
+        future = Future()
+        future.set_exception(e)
+        return key[0], future
+    with _lock:
+        _parsed[key] = (future, estimated_mb)
+        _parsed_mb += estimated_mb
+        _evict_parsed()
+    return key[0], future
+
+def _run_pipeline(shift_type, parse_futures, engine):
+    metrics = {}
+    # Solo espera lo que aún no terminó de leerse mientras se subían los demás archivos
+    with stage(metrics, 'read'):
+        try:
+            # Copia superficial: la limpieza renombra columnas y el parseo se reutiliza
+            frames = [future.result().copy(deep=False) for future in parse_futures]
+        except Exception as e:
+            return None, f"Error reading files: {e}"
+    return PROCESSORS[shift_type](*frames, engine=engine, metrics=metrics)
+
+def speculate(shift_type, files, engine='pandas'):
+    """
+    Returns a future with (data, error) for the given files (ordered as FILE_KEYS[shift_type]),
+    starting the aggregation in the background as soon as every file is present.
+    The parsed exports are released once the aggregation finishes; the result is kept.
+    """
+    contents = [_file_bytes(f) for f in files]
+    keys = [_digest(content, engine) for content in contents]
+    job_key = (shift_type, engine, tuple(digest for digest, _ in keys))
+    with _lock:
+        if job_key in _results:
+            _results.move_to_end(job_key)
+            return _results[job_key]
+    parse_futures = [_prefetch(content, key, shift_type, role)[1]
+                     for content, key, role in zip(contents, keys, FILE_KEYS[shift_type])]
+    future = _job_executor().submit(_run_pipeline, shift_type, parse_futures, engine)
+    with _lock:
+        _remember_result(job_key, future)
+    future.add_done_callback(lambda _: _settle(job_key, keys, parse_futures, future))
+    return future
@@ -1,84 +1,182 @@
 
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import pandas as pd
 import numpy as np
-import io
-import streamlit as st
 
-@st.cache_data
-def clean_column_names(df):
+from modules.profiling import stage
+from modules import memory_guard
+from modules.schema import apply_schema, resolve_columns
+
+# Roles de archivo por esquema de turnos (nombres compartidos por la app, la API y la detección automática)
+FILE_KEYS = {
+    '8h': ['turno_6_2', 'turno_2_10', 'turno_10_6', 'alces'],
+    '12h': ['turno_am', 'turno_pm', 'alces'],
+}
+
+# Pool de parseo de larga vida, compartido por read_excel_files y modules.prefetch
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+# Por debajo de este tamaño total, el viaje de ida y vuelta al proceso cuesta más que leer en serie
+PARALLEL_MIN_BYTES = 1_000_000
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def worker_context():
     """
-    Simulates janitor.clean_names() from R.
-    Converts column names to snake_case.
+    Start method for worker pools. The pools are created from Streamlit's threads, and forking a
+    multithreaded process can copy held locks, so 'forkserver' is used ('spawn' where unavailable).
     """
-    # Use regex=False for literal replacement of parenthesis
-    df.columns = (df.columns.str.lower()
-                  .str.replace(' ', '_', regex=False)
-                  .str.replace('-', '_', regex=False)
-                  .str.replace('.', '_', regex=False)
-                  .str.replace('(', '', regex=False)
-                  .str.replace(')', '', regex=False))
-    return df
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
 
-@st.cache_data
-def process_8h_data(file_6_2, file_2_10, file_10_6, file_alces):
+def parse_pool():
     """
-    Processes the 3 files for 8-hour shifts + Alces file.
+    Returns the process pool used to parse exports, created on first use and kept for
+    the life of the server.
     """
-    
-    # Read files
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=worker_context())
+    return _parse_pool
+
+def submit_parse(fn, *args):
+    """
+    Submits a task to parse_pool(). A pool left broken by a killed worker (e.g. by the OOM
+    killer) is replaced once; BrokenProcessPool propagates if the new one fails too.
+    """
+    global _parse_pool
+    pool = parse_pool()
     try:
-        df_6_2 = pd.read_excel(file_6_2)
-        df_2_10 = pd.read_excel(file_2_10)
-        df_10_6 = pd.read_excel(file_10_6)
-        df_alces = pd.read_excel(file_alces)
-    except Exception as e:
-        return None, f"Error reading files: {e}"
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        with _parse_pool_lock:
+            if _parse_pool is pool:
+                _parse_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return parse_pool().submit(fn, *args)
 
-    # Clean names
-    df_6_2 = clean_column_names(df_6_2)
-    df_2_10 = clean_column_names(df_2_10)
-    df_10_6 = clean_column_names(df_10_6)
-    df_alces = clean_column_names(df_alces)
-
-    def rename_cols(df):
-        cols = df.columns
-        map_dict = {}
-        found_targets = []
-
-        for col in cols:
-            # Machine (Más flexible con nombres de columna comunes)
-            if any(x in col for x in ['maquina', 'máquina', 'equipo', 'unidad', 'machine']) and 'maquina' not in found_targets:
-                 map_dict[col] = 'maquina'
-                 found_targets.append('maquina')
-                 continue
-            
-            # AutoTrac H (Buscar específicamente 'h' como unidad, no como parte de palabra)
-            if 'autotrac' in col and 'activo' in col and (col.endswith('_h') or '_h_' in col or '(h)' in col) and 'autotrac_activo_h' not in found_targets:
-                 map_dict[col] = 'autotrac_activo_h'
-                 found_targets.append('autotrac_activo_h')
-                 continue
-
-            # Utilizacion Cosecha H (Evitar que el 'h' de 'cosecha' cause falso positivo con %)
-            if 'utilizac' in col and 'cosecha' in col and (col.endswith('_h') or '_h_' in col or '(h)' in col) and 'utilizacion_cosecha_h' not in found_targets:
-                 map_dict[col] = 'utilizacion_cosecha_h'
-                 found_targets.append('utilizacion_cosecha_h')
-                 continue
-
-        return df.rename(columns=map_dict)
-
-    df_6_2 = rename_cols(df_6_2)
-    df_2_10 = rename_cols(df_2_10)
-    df_10_6 = rename_cols(df_10_6)
-    
-    # Add 'turno' column
-    df_6_2['turno'] = "Turno 6-2"
-    df_2_10['turno'] = "Turno 2-10"
-    df_10_6['turno'] = "Turno 10-6"
+def _read_excel_bytes(content, dtype_backend='numpy_nullable'):
+    if dtype_backend == 'pyarrow':
+        return pd.read_excel(io.BytesIO(content), dtype_backend='pyarrow')
+    return pd.read_excel(io.BytesIO(content))
 
-    # Combine
-    df_completo = pd.concat([df_6_2, df_2_10, df_10_6], ignore_index=True)
-    df_completo = df_completo.loc[:, ~df_completo.columns.duplicated()]
+def parse_in_worker(parser, *args):
+    """
+    Runs a parser in a pool worker and stamps the frame with the worker's peak memory
+    (attrs['parse_peak_mb']), which the parent's 'read' stage cannot see.
+    """
+    metrics = {}
+    with stage(metrics, 'parse'):
+        df = parser(*args)
+    df.attrs['parse_peak_mb'] = metrics['parse'].get('peak_mb')
+    return df
+
+def _record_worker_peaks(metrics, frames):
+    peaks = [df.attrs.pop('parse_peak_mb', None) for df in frames]
+    peaks = [p for p in peaks if p is not None]
+    if peaks:
+        # Peor caso: todos los archivos parseados a la vez en workers distintos
+        metrics.setdefault('read', {})['workers_peak_mb'] = sum(peaks)
+
+def _file_bytes(f):
+    if hasattr(f, 'read'):
+        f.seek(0)
+        content = f.read()
+        f.seek(0)
+        return content
+    with open(f, 'rb') as fh:
+        return fh.read()
+
+def read_excel_files(files, parse_workers=None, engine='pandas', spill_columns=None):
+    """
+    Reads several Excel files. Jobs of at least PARALLEL_MIN_BYTES are parsed in parallel on
+    the shared parse_pool() when more than one CPU is available; smaller ones are read in series.
+    parse_workers=0 always reads sequentially (e.g. when already running inside a worker).
+    engine='arrow' returns Arrow-backed columns.
+    With spill_columns (one column resolver per file), a job whose estimated size exceeds
+    memory_guard.MEMORY_BUDGET_MB is streamed through disk instead (frames get attrs['spilled']).
+    """
+    if spill_columns is not None and memory_guard.over_budget(files)[1]:
+        return [read_excel_spilled(f, resolver) for f, resolver in zip(files, spill_columns)]
+
+    dtype_backend = 'pyarrow' if engine == 'arrow' else 'numpy_nullable'
+    contents = [_file_bytes(f) for f in files]
+
+    if parse_workers == 0 or len(files) < 2 or PARSE_WORKERS < 2 or sum(map(len, contents)) < PARALLEL_MIN_BYTES:
+        return [_read_excel_bytes(content, dtype_backend) for content in contents]
+
+    futures = [submit_parse(parse_in_worker, _read_excel_bytes, content, dtype_backend) for content in contents]
+    return [future.result() for future in futures]
+
+def rename_shift_columns(df):
+    """
+    Maps the export headers of a shift file to maquina / autotrac_activo_h / utilizacion_cosecha_h.
+    Column labels are replaced in place, so the data is not copied.
+    """
+    return apply_schema(df, 'shift')
+
+def read_excel_spilled(f, resolve_columns):
+    """
+    Chunked, disk-spilled read of one export (see modules.memory_guard).
+    """
+    df = memory_guard.read_excel_spilled(f, resolve_columns)
+    df.attrs['spilled'] = True
+    return df
+
+def _spill_columns(header, role, kinds):
+    renamed = resolve_columns(role, tuple(header))[0]
+    columns = {}
+    for position, name in enumerate(renamed):
+        if name in kinds and name not in [n for n, _ in columns.values()]:
+            columns[position] = (name, kinds[name])
+    return columns
+
+def shift_spill_columns(header):
+    """
+    Columns a shift export keeps on the spilled path, resolved with the schema registry.
+    """
+    return _spill_columns(header, 'shift',
+                          {'maquina': 'str', 'autotrac_activo_h': 'float', 'utilizacion_cosecha_h': 'float'})
+
+def alces_spill_columns(header):
+    return _spill_columns(header, 'alces', {'maquina': 'str', 'alce': 'float'})
+
+def rename_alces_columns(df):
+    """
+    Maps the Alces master headers to maquina / alce (in place).
+    """
+    return apply_schema(df, 'alces')
+
+SHIFT_COLUMNS = ['maquina', 'autotrac_activo_h', 'utilizacion_cosecha_h']
 
+def combine_shifts(shift_frames, engine='pandas'):
+    """
+    Stacks the shift exports ([(turno, df), ...]) keeping only the columns the aggregation uses,
+    so the concatenation does not copy the rest of the export.
+    """
+    parts = []
+    for turno, df in shift_frames:
+        df = df.loc[:, ~df.columns.duplicated()]
+        parts.append(df[SHIFT_COLUMNS].assign(turno=turno))
+    df_completo = pd.concat(parts, ignore_index=True)
+
+    if engine == 'arrow':
+        import pyarrow as pa
+        df_completo['turno'] = df_completo['turno'].astype(pd.ArrowDtype(pa.string()))
+    return df_completo
+
+def aggregate_shifts(df_completo, over_limit_value):
+    """
+    Sums hours per machine and shift and computes the AutoTrac share.
+    Shares above 100% are replaced by over_limit_value.
+    """
     # Ensure numeric types
     df_completo['autotrac_activo_h'] = pd.to_numeric(df_completo['autotrac_activo_h'], errors='coerce').fillna(0)
     df_completo['utilizacion_cosecha_h'] = pd.to_numeric(df_completo['utilizacion_cosecha_h'], errors='coerce').fillna(0)
@@ -89,111 +187,140 @@ def process_8h_data(file_6_2, file_2_10, file_10_6, file_alces):
         'utilizacion_cosecha_h': 'sum'
     }).reset_index()
 
-    # Calculate percentage over aggregated hours
-    df_completo['autotrac_activo_pct'] = df_completo.apply(
-        lambda row: row['autotrac_activo_h'] / row['utilizacion_cosecha_h'] if row['utilizacion_cosecha_h'] > 0 else 0, axis=1
-    )
+    # Calculate percentage over aggregated hours (vectorizado)
+    util = df_completo['utilizacion_cosecha_h']
+    df_completo['autotrac_activo_pct'] = (df_completo['autotrac_activo_h'] / util.where(util > 0)).fillna(0)
+
+    df_completo.loc[df_completo['autotrac_activo_pct'] > 1, 'autotrac_activo_pct'] = over_limit_value
+    return df_completo
+
+def merge_alces(df_completo, df_alces, engine='pandas'):
+    """
+    Attaches the alce of each machine from the Alces master.
+    """
+    df_alces = rename_alces_columns(df_alces)[['maquina', 'alce']]
+
+    if engine == 'arrow':
+        import pyarrow as pa
+
+        # Texto en Arrow: la conversión y el strip corren en código nativo
+        string_type = pd.ArrowDtype(pa.string())
+        machine_completo = df_completo['maquina'].astype(string_type).str.strip()
+        machine_alces = df_alces['maquina'].astype(string_type).str.strip()
+    else:
+        machine_completo = df_completo['maquina'].astype(str).str.strip()
+        machine_alces = df_alces['maquina'].astype(str).str.strip()
+
+    df_completo = df_completo.assign(maquina=machine_completo)
+    df_alces = df_alces.assign(maquina=machine_alces)
+
+    df_merged = pd.merge(df_completo, df_alces, on='maquina', how='left')
+    df_merged['alce'] = pd.to_numeric(df_merged['alce'], errors='coerce')
+    return df_merged
+
+def process_8h_data(file_6_2, file_2_10, file_10_6, file_alces, parse_workers=None, engine='pandas'):
+    """
+    Processes the 3 files for 8-hour shifts + Alces file.
+    engine='arrow' keeps Arrow dtypes end to end. Per-stage latency and peak memory
+    (see modules.profiling.stage) are stored in df.attrs['stage_metrics'].
+    """
+    metrics = {}
+    
+    # Read files
+    with stage(metrics, 'read'):
+        try:
+            frames = read_excel_files([file_6_2, file_2_10, file_10_6, file_alces], parse_workers, engine,
+                                      spill_columns=[shift_spill_columns] * 3 + [alces_spill_columns])
+        except Exception as e:
+            return None, f"Error reading files: {e}"
+
+    return process_8h_frames(*frames, engine=engine, metrics=metrics)
+
+def process_8h_frames(df_6_2, df_2_10, df_10_6, df_alces, engine='pandas', metrics=None):
+    """
+    Runs the 8-hour pipeline on already parsed exports (see modules.prefetch).
+    """
+    metrics = {} if metrics is None else metrics
+    spilled = any(df.attrs.get('spilled', False) for df in (df_6_2, df_2_10, df_10_6, df_alces))
+    _record_worker_peaks(metrics, (df_6_2, df_2_10, df_10_6, df_alces))
+    if spilled:
+        # Las columnas volcadas ya son Arrow: el resto del pipeline sigue en Arrow
+        engine = 'arrow'
+
+    # Clean names
+    with stage(metrics, 'clean'):
+        df_6_2 = rename_shift_columns(df_6_2)
+        df_2_10 = rename_shift_columns(df_2_10)
+        df_10_6 = rename_shift_columns(df_10_6)
+        df_alces = rename_alces_columns(df_alces)
+
+    # Combine
+    with stage(metrics, 'combine'):
+        df_completo = combine_shifts([
+            ("Turno 6-2", df_6_2),
+            ("Turno 2-10", df_2_10),
+            ("Turno 10-6", df_10_6),
+        ], engine)
 
     # Ajuste: si > 1, se pone 0.95 (95%) en lugar de NA
-    df_completo.loc[df_completo['autotrac_activo_pct'] > 1, 'autotrac_activo_pct'] = 0.95
+    with stage(metrics, 'aggregate'):
+        df_completo = aggregate_shifts(df_completo, 0.95)
     
     # Merge with Alces
-    cols_alces = df_alces.columns
-    alce_map = {}
-    for col in cols_alces:
-        if any(x in col for x in ['maquina', 'máquina', 'equipo', 'unidad']):
-            alce_map[col] = 'maquina'
-        if 'alce' in col:
-            alce_map[col] = 'alce'
-    df_alces = df_alces.rename(columns=alce_map)
-    
-    df_completo['maquina'] = df_completo['maquina'].astype(str).str.strip()
-    df_alces['maquina'] = df_alces['maquina'].astype(str).str.strip()
-
-    df_merged = pd.merge(df_completo, df_alces[['maquina', 'alce']], on='maquina', how='left')
-    df_merged['alce'] = pd.to_numeric(df_merged['alce'], errors='coerce')
+    with stage(metrics, 'merge'):
+        df_merged = merge_alces(df_completo, df_alces, engine)
 
+    df_merged.attrs['stage_metrics'] = metrics
+    df_merged.attrs['spilled'] = spilled
     return df_merged, None
 
-@st.cache_data
-def process_12h_data(file_am, file_pm, file_alces):
+def process_12h_data(file_am, file_pm, file_alces, parse_workers=None, engine='pandas'):
     """
     Processes the 2 files for 12-hour shifts.
     """
-    try:
-        df_am = pd.read_excel(file_am)
-        df_pm = pd.read_excel(file_pm)
-        df_alces = pd.read_excel(file_alces)
-    except Exception as e:
-         return None, f"Error reading files: {e}"
-
-    df_am = clean_column_names(df_am)
-    df_pm = clean_column_names(df_pm)
-    df_alces = clean_column_names(df_alces)
-
-    def rename_cols(df):
-        cols = df.columns
-        map_dict = {}
-        found_targets = []
-        
-        for col in cols:
-            if any(x in col for x in ['maquina', 'máquina', 'equipo', 'unidad', 'machine']) and 'maquina' not in found_targets:
-                 map_dict[col] = 'maquina'
-                 found_targets.append('maquina')
-                 continue
-            
-            if 'autotrac' in col and 'activo' in col and (col.endswith('_h') or '_h_' in col or '(h)' in col) and 'autotrac_activo_h' not in found_targets:
-                 map_dict[col] = 'autotrac_activo_h'
-                 found_targets.append('autotrac_activo_h')
-                 continue
-                 
-            if 'utilizac' in col and 'cosecha' in col and (col.endswith('_h') or '_h_' in col or '(h)' in col) and 'utilizacion_cosecha_h' not in found_targets:
-                 map_dict[col] = 'utilizacion_cosecha_h'
-                 found_targets.append('utilizacion_cosecha_h')
-                 continue
-                 
-        return df.rename(columns=map_dict)
-
-    df_am = rename_cols(df_am)
-    df_pm = rename_cols(df_pm)
-
-    df_am['turno'] = "Turno 6am-6pm"
-    df_pm['turno'] = "Turno 6pm-6am"
-
-    df_completo = pd.concat([df_am, df_pm], ignore_index=True)
-    df_completo = df_completo.loc[:, ~df_completo.columns.duplicated()]
+    metrics = {}
 
-    df_completo['autotrac_activo_h'] = pd.to_numeric(df_completo['autotrac_activo_h'], errors='coerce').fillna(0)
-    df_completo['utilizacion_cosecha_h'] = pd.to_numeric(df_completo['utilizacion_cosecha_h'], errors='coerce').fillna(0)
+    with stage(metrics, 'read'):
+        try:
+            frames = read_excel_files([file_am, file_pm, file_alces], parse_workers, engine,
+                                      spill_columns=[shift_spill_columns] * 2 + [alces_spill_columns])
+        except Exception as e:
+             return None, f"Error reading files: {e}"
 
-    # AGREGACIÓN
-    df_completo = df_completo.groupby(['maquina', 'turno']).agg({
-        'autotrac_activo_h': 'sum',
-        'utilizacion_cosecha_h': 'sum'
-    }).reset_index()
+    return process_12h_frames(*frames, engine=engine, metrics=metrics)
 
-    df_completo['autotrac_activo_pct'] = df_completo.apply(
-        lambda row: row['autotrac_activo_h'] / row['utilizacion_cosecha_h'] if row['utilizacion_cosecha_h'] > 0 else 0, axis=1
-    )
-    
-    df_completo.loc[df_completo['autotrac_activo_pct'] > 1, 'autotrac_activo_pct'] = np.nan
+def process_12h_frames(df_am, df_pm, df_alces, engine='pandas', metrics=None):
+    """
+    Runs the 12-hour pipeline on already parsed exports.
+    """
+    metrics = {} if metrics is None else metrics
+    spilled = any(df.attrs.get('spilled', False) for df in (df_am, df_pm, df_alces))
+    _record_worker_peaks(metrics, (df_am, df_pm, df_alces))
+    if spilled:
+        # Las columnas volcadas ya son Arrow: el resto del pipeline sigue en Arrow
+        engine = 'arrow'
+
+    with stage(metrics, 'clean'):
+        df_am = rename_shift_columns(df_am)
+        df_pm = rename_shift_columns(df_pm)
+        df_alces = rename_alces_columns(df_alces)
+
+    with stage(metrics, 'combine'):
+        df_completo = combine_shifts([
+            ("Turno 6am-6pm", df_am),
+            ("Turno 6pm-6am", df_pm),
+        ], engine)
+
+    # AGREGACIÓN (> 100% queda como NA)
+    with stage(metrics, 'aggregate'):
+        df_completo = aggregate_shifts(df_completo, np.nan)
 
     # Alces merge
-    cols_alces = df_alces.columns
-    alce_map = {}
-    for col in cols_alces:
-        if any(x in col for x in ['maquina', 'máquina', 'equipo', 'unidad']):
-            alce_map[col] = 'maquina'
-        if 'alce' in col:
-            alce_map[col] = 'alce'
-    df_alces = df_alces.rename(columns=alce_map)
-
-    df_completo['maquina'] = df_completo['maquina'].astype(str).str.strip()
-    df_alces['maquina'] = df_alces['maquina'].astype(str).str.strip()
-
-    df_merged = pd.merge(df_completo, df_alces[['maquina', 'alce']], on='maquina', how='left')
-    df_merged['alce'] = pd.to_numeric(df_merged['alce'], errors='coerce')
+    with stage(metrics, 'merge'):
+        df_merged = merge_alces(df_completo, df_alces, engine)
 
+    df_merged.attrs['stage_metrics'] = metrics
+    df_merged.attrs['spilled'] = spilled
     return df_merged, None
 
 def calculate_global_stats(df):
@@ -214,3 +341,116 @@ def calculate_global_stats(df):
     
     return global_stats
 
+def _process_site(sitio, shift_type, contents, engine='pandas'):
+    """
+    Worker task: runs the single-site pipeline for one site bundle.
+    Any failure comes back as the site's error, so the other sites still finish.
+    """
+    try:
+        buffers = [io.BytesIO(c) for c in contents]
+        if shift_type == '8h':
+            data, err = process_8h_data(*buffers, parse_workers=0, engine=engine)
+        else:
+            data, err = process_12h_data(*buffers, parse_workers=0, engine=engine)
+        if data is not None:
+            data.insert(0, 'sitio', sitio)
+    except Exception as e:
+        return sitio, None, f"Error processing site: {e}"
+    return sitio, data, err
+
+def process_sites(bundles, shift_type, max_workers=None, engine='pandas'):
+    """
+    Processes several site bundles ({sitio: {rol: archivo}}), each one on its own worker process,
+    and merges the per-site results into a single frame with a 'sitio' column.
+    """
+    tasks = {
+        sitio: [_file_bytes(files[key]) for key in FILE_KEYS[shift_type]]
+        for sitio, files in bundles.items()
+    }
+
+    results = {}
+    errors = {}
+    with ProcessPoolExecutor(max_workers=max_workers or len(tasks), mp_context=worker_context()) as pool:
+        futures = [pool.submit(_process_site, sitio, shift_type, contents, engine) for sitio, contents in tasks.items()]
+        for future in futures:
+            sitio, data, err = future.result()
+            if data is None:
+                errors[sitio] = err
+            else:
+                results[sitio] = data
+
+    if not results:
+        return None, errors
+    return pd.concat(list(results.values()), ignore_index=True), errors
+
+def calculate_site_stats(df):
+    """
+    Calculates stats per site and shift for multi-site runs.
+    """
+    site_stats = df.groupby(['sitio', 'turno']).agg({
+        'autotrac_activo_h': 'sum',
+        'utilizacion_cosecha_h': 'sum'
+    }).reset_index()
+
+    site_stats['autotrac_activo_pct'] = site_stats.apply(
+        lambda row: row['autotrac_activo_h'] / row['utilizacion_cosecha_h'] if row['utilizacion_cosecha_h'] > 0 else 0,
+        axis=1
+    )
+    return site_stats
+
+
+TARGET_PCT = 0.8
+
+def build_fleet_summary(df, global_stats):
+    """
+    Precomputes the fleet KPIs shared by the dashboard and the PDF report.
+    Computed once per processing run so presentation code never rescans the data.
+    Multi-site frames (with a 'sitio' column) get one nested summary per site;
+    alce metrics then live only in the per-site summaries.
+    """
+    multi_site = 'sitio' in df.columns
+    machine_key = ['sitio', 'maquina'] if multi_site else 'maquina'
+    machine_means = df.groupby(machine_key)['autotrac_activo_pct'].mean()
+    total_machines = len(machine_means)
+
+    summary = {
+        'total_machines': total_machines,
+        'avg_autotrac': global_stats['autotrac_activo_pct'].mean(),
+        'total_hours': global_stats['utilizacion_cosecha_h'].sum(),
+        'machine_means': machine_means,
+        'machines_above_target': int((machine_means >= TARGET_PCT).sum()),
+        'machines_zero': int((machine_means == 0).sum()),
+        'shift_breakdown': global_stats,
+        'alces': {},
+    }
+
+    if multi_site:
+        summary['site_stats'] = calculate_site_stats(df)
+        summary['sites'] = {}
+        for sitio, df_site in df.groupby('sitio'):
+            df_site = df_site.drop(columns='sitio')
+            summary['sites'][sitio] = build_fleet_summary(df_site, calculate_global_stats(df_site))
+        summary['alce_order'] = []
+        return summary
+
+    # Métricas por alce (una sola pasada agrupada)
+    df_alces = df[df['alce'].notna()]
+    alce_machine_means = df_alces.groupby(['alce', 'maquina'])['autotrac_activo_pct'].mean()
+
+    for alce, df_alce in df_alces.groupby('alce'):
+        means = alce_machine_means.loc[alce]
+        pct = df_alce['autotrac_activo_pct']
+        has_values = pct.notna().any()
+        summary['alces'][int(alce)] = {
+            'avg': pct.mean(),
+            'machines': df_alce['maquina'].nunique(),
+            'machines_zero': int((means == 0).sum()),
+            'above_target': int((pct >= TARGET_PCT).sum()),
+            'best_machine': df_alce.loc[pct.idxmax(), 'maquina'] if has_values else 'N/A',
+            'best_value': pct.max() if has_values else 0,
+            'worst_machine': df_alce.loc[pct.idxmin(), 'maquina'] if has_values else 'N/A',
+            'worst_value': pct.min() if has_values else 0,
+        }
+
+    summary['alce_order'] = sorted(summary['alces'])
+    return summary
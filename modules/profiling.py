@@ -0,0 +1,52 @@
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+def _status_mb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _reset_rss_peak():
+    """
+    Resets the process's resident-set high-water mark (VmHWM); False where /proc does not allow it.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+@contextmanager
+def stage(metrics, name):
+    """
+    Records the latency and peak memory of a pipeline stage in metrics[name].
+    peak_mb is the traced Python/NumPy peak when tracemalloc is tracing; otherwise the
+    resident-set high-water mark over the stage minus the RSS at its start (Linux), which
+    also covers Arrow buffers. The high-water mark is per process, so jobs running at the
+    same time in one server share it.
+    """
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    else:
+        base = _status_mb('VmRSS') if _reset_rss_peak() else None
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = {'seconds': time.perf_counter() - start}
+        if tracing:
+            entry['peak_mb'] = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+        elif base is not None:
+            entry['peak_mb'] = max(0.0, (_status_mb('VmHWM') or base) - base)
+        metrics[name] = entry
@@ -0,0 +1,121 @@
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Estado de FPDF que el contenido de una página deja modificado
+PDF_STATE = ['x', 'y', 'lasth', 'font_family', 'font_style', 'font_size_pt', 'font_size', 'current_font', 'underline',
+             'draw_color', 'fill_color', 'text_color', 'color_flag', 'line_width', 'ws']
+
+# Tope del caché en bytes (PNG de gráficos + contenido de páginas), no en entradas
+REPORT_CACHE_MB = float(os.environ.get('AUTOTRAC_REPORT_CACHE_MB', 64))
+
+def data_fingerprint(df):
+    """
+    Order-independent hash of a frame's contents, used as the cache key of its page and chart.
+    """
+    cols = sorted(df.columns)
+    ordered = df[cols].sort_values([c for c in ('maquina', 'turno') if c in cols], kind='stable')
+    hashed = pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+    digest = hashlib.sha256(hashed.tobytes())
+    digest.update(repr(cols).encode())
+    return digest.hexdigest()
+
+class ReportCache:
+    """
+    LRU cache shared by every report generated in the process, bounded by the total size
+    of its values. Stores the content stream of vector alce pages (replayed verbatim into
+    new reports) and the PNG bytes of raster charts.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = int(REPORT_CACHE_MB * 1e6) if max_bytes is None else max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    @staticmethod
+    def _size(value):
+        return len(value['ops']) if isinstance(value, dict) else len(value)
+
+    def put(self, key, value):
+        size = self._size(value)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.sizes.pop(key)
+                del self.entries[key]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                oldest, _ = self.entries.popitem(last=False)
+                self.total_bytes -= self.sizes.pop(oldest)
+
+    def page_key(self, pdf, *parts):
+        """
+        Key of a page body: the caller's parts plus the writer state the body starts from,
+        since FPDF omits operators that would repeat the current font.
+        """
+        state = tuple(repr(getattr(pdf, attr)) for attr in PDF_STATE if attr != 'current_font')
+        return ('page',) + parts + state
+
+    def page_start(self, pdf):
+        return pdf.page, len(pdf.pages[pdf.page])
+
+    def store_page(self, pdf, key, start):
+        """
+        Saves the operations written since `start` if the body fit on a single page.
+        """
+        page, offset = start
+        if pdf.page != page:
+            return
+        self.put(key, {
+            'ops': pdf.pages[page][offset:],
+            'state': {attr: getattr(pdf, attr) for attr in PDF_STATE},
+            'fonts': {name: font['i'] for name, font in pdf.fonts.items()},
+        })
+
+    def replay_page(self, pdf, key):
+        """
+        Appends a cached page body to the current page and restores the writer state.
+        Returns False when the page is not cached or uses a font this document has not registered.
+        """
+        cached = self.get(key)
+        if cached is None:
+            return False
+        for name, i in cached['fonts'].items():
+            if name not in pdf.fonts or pdf.fonts[name]['i'] != i:
+                return False
+        pdf.pages[pdf.page] += cached['ops']
+        for attr, value in cached['state'].items():
+            setattr(pdf, attr, value)
+        pdf.current_font = pdf.fonts[pdf.font_family + pdf.font_style]
+        return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+REPORT_CACHE = ReportCache()
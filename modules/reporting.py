@@ -1,131 +1,205 @@
 
-from fpdf import FPDF
-import matplotlib.pyplot as plt
 import pandas as pd
-import io
+import numpy as np
 import tempfile
 import os
 import datetime
 
-class ProfessionalPDF(FPDF):
-    def header(self):
-        # Logo placeholder (if file existed, we'd add it)
-        # self.image('logo.png', 10, 8, 33)
-        self.set_font('Arial', 'B', 10)
-        self.set_text_color(120, 120, 120)
-        self.cell(0, 10, 'Informe de Productividad - Análisis AutoTrac(TM)', 0, 1, 'R')
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128)
-        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 16)
-        self.set_text_color(54, 124, 57) # Deere Green
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
-        self.set_draw_color(54, 124, 57)
-        self.line(10, self.get_y(), 200, self.get_y())
-        self.ln(10)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 11)
-        self.set_text_color(0)
-        self.multi_cell(0, 6, body)
-        self.ln()
-
-def create_static_chart(df, title, shift_type):
-    """
-    Generic function to create matplotlib chart for PDF.
-    """
+from modules.processing import build_fleet_summary
+from modules.report_cache import REPORT_CACHE, data_fingerprint
+
+def get_static_colors(shift_type):
     colors_8h = {"Turno 6-2": "#FFD700", "Turno 2-10": "#228B22", "Turno 10-6": "#808080"}
     colors_12h = {"Turno 6am-6pm": "#f1c40f", "Turno 6pm-6am": "#2c3e50"}
-    colors = colors_8h if shift_type == '8h' else colors_12h
-    
+    return colors_8h if shift_type == '8h' else colors_12h
+
+def prepare_chart_data(df, shift_type):
+    """
+    Aligns the per-shift values on a sorted machine axis, shared by the raster and vector charts.
+    """
+    colors = get_static_colors(shift_type)
+
     # Sort
     df = df.sort_values('maquina')
-    
+
     machines = df['maquina'].unique()
     turnos = [t for t in colors.keys() if t in df['turno'].unique()]
-    
-    import numpy as np
-    x = np.arange(len(machines))
-    width = 0.8 / len(turnos) if len(turnos) > 0 else 0.4
-    
-    # Ajustar tamaño según cantidad de máquinas
-    fig_width = min(12, max(8, len(machines) * 0.6))
-    fig, ax = plt.subplots(figsize=(fig_width, 5))
-    
-    for i, turno in enumerate(turnos):
+
+    values = {}
+    for turno in turnos:
         subset = df[df['turno'] == turno]
         # Align
-        subset = subset.set_index('maquina').reindex(machines, fill_value=0).reset_index()
-        offset = width * i
-        
-        # Convertir a porcentaje para visualización
-        values_pct = subset['autotrac_activo_pct'] * 100
-        
-        rects = ax.bar(x + offset, subset['autotrac_activo_pct'], width, label=turno, color=colors.get(turno, 'blue'))
-        
-        # Etiquetas con formato correcto
-        for j, (rect, val) in enumerate(zip(rects, values_pct)):
-            height = rect.get_height()
-            if height > 0:
-                ax.text(rect.get_x() + rect.get_width()/2., height,
-                       f'{val:.0f}%',
-                       ha='center', va='bottom', fontsize=8, fontweight='bold')
-        
-    ax.set_ylabel('AutoTrac (% de Uso)', fontsize=11, fontweight='bold')
-    ax.set_title(title, pad=20, fontsize=13, fontweight='bold')
-    ax.set_xticks(x + width * (len(turnos) - 1) / 2)
-    ax.set_xticklabels(machines, rotation=45, ha='right', fontsize=9)
-    ax.legend(loc='upper right', framealpha=0.9)
-    ax.axhline(y=0.8, color='r', linestyle='--', linewidth=2, label='Meta 80%')
-    ax.set_ylim(0, 1.05)
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: f'{y*100:.0f}%'))
-    ax.grid(axis='y', alpha=0.3, linestyle='--')
-    
-    plt.tight_layout()
-    
-    img_buf = io.BytesIO()
-    plt.savefig(img_buf, format='png', dpi=200, bbox_inches='tight')
-    plt.close(fig)
-    return img_buf
-
-def generate_pdf(processed_data, global_stats, shift_type):
-    pdf = ProfessionalPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # --- Cover Page ---
-    pdf.add_page()
-    pdf.ln(60)
-    pdf.set_font('Arial', 'B', 24)
-    pdf.set_text_color(54, 124, 57)
-    pdf.cell(0, 20, 'Informe de Productividad', 0, 1, 'C')
-    
-    pdf.set_font('Arial', '', 14)
-    pdf.set_text_color(80)
-    pdf.cell(0, 10, 'Análisis de Uso de AutoTrac(TM)', 0, 1, 'C')
-    
-    pdf.ln(20)
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 10, f'Fecha: {datetime.date.today()}', 0, 1, 'C')
-    pdf.ln(50)
-    
-    # --- Executive Summary ---
-    pdf.add_page()
-    pdf.chapter_title('Resumen Ejecutivo')
+        subset = subset.set_index('maquina').reindex(machines, fill_value=0)
+        values[turno] = subset['autotrac_activo_pct'].to_numpy(dtype=float, na_value=np.nan)
+
+    return machines, turnos, colors, values
+
+def create_static_chart(df, title, shift_type, dpi=200):
+    """
+    Generic function to create matplotlib chart for PDF (raster fallback).
+    """
+    from modules.static_charts import render_charts
+
+    return render_charts([prepare_chart_data(df, shift_type) + (title,)], dpi)[0]
+
+def report_charts(processed_data, summary):
+    """
+    Yields (df, title) for every chart of the report, in page order.
+    """
+    cols = ['maquina', 'turno', 'autotrac_activo_pct']
     
-    avg_autotrac = global_stats['autotrac_activo_pct'].mean()
-    total_machines = processed_data['maquina'].nunique()
-    total_hours = global_stats['utilizacion_cosecha_h'].sum()
+    if 'sitio' not in processed_data.columns:
+        yield processed_data[processed_data['maquina'] != 'Global'][cols], 'Desempeño Global por Máquina'
+        sections = [(processed_data, summary)]
+    else:
+        yield summary['site_stats'][['sitio', 'turno', 'autotrac_activo_pct']].rename(columns={'sitio': 'maquina'}), 'Desempeño por Sitio'
+        sections = []
+        for sitio, site_summary in summary['sites'].items():
+            df_site = processed_data[processed_data['sitio'] == sitio]
+            yield df_site[cols], f'Desempeño por Máquina - {sitio}'
+            sections.append((df_site, site_summary))
     
-    # Calcular máquinas sin uso
-    machines_zero = (processed_data.groupby('maquina')['autotrac_activo_pct'].mean() == 0).sum()
-    machines_above_target = (processed_data.groupby('maquina')['autotrac_activo_pct'].mean() >= 0.8).sum()
+    for df, section_summary in sections:
+        for alce in section_summary['alce_order']:
+            yield df[df['alce'] == alce], f'Rendimiento Detallado - Alce {alce}'
+
+def prerender_charts(processed_data, summary, shift_type, dpi, cache):
+    """
+    Renders every raster chart of the report missing from the cache in one batch,
+    so add_chart only picks up the PNGs.
+    """
+    from modules.static_charts import render_charts
+
+    pending = {}
+    for df, title in report_charts(processed_data, summary):
+        key = ('chart', data_fingerprint(df), title, shift_type, dpi)
+        if key not in pending and cache.get(key) is None:
+            pending[key] = prepare_chart_data(df, shift_type) + (title,)
+
+    for key, img in zip(pending, render_charts(pending.values(), dpi)):
+        cache.put(key, img.getvalue())
+
+def _hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+def draw_vector_chart(pdf, df, title, shift_type, x=10, w=190, h=95):
+    """
+    Draws the grouped bar chart directly as PDF vector graphics at the current position.
+    Same layout as create_static_chart: bars per shift, % labels and the 80% target line.
+    """
+    machines, turnos, colors, values = prepare_chart_data(df, shift_type)
+
+    if pdf.get_y() + h > pdf.page_break_trigger:
+        pdf.add_page()
+    top = pdf.get_y()
+
+    # Área de trazado
+    plot_x = x + 14
+    plot_w = w - 16
+    plot_top = top + 14
+    plot_h = h - 14 - 22
+    plot_bottom = plot_top + plot_h
+    y_max = 1.05
+
+    def y_pos(value):
+        return plot_bottom - plot_h * min(value, y_max) / y_max
+
+    # Título
+    pdf.set_text_color(0)
+    pdf.set_font('Arial', 'B', 11)
+    pdf.set_xy(x, top)
+    pdf.cell(w, 6, title, 0, 0, 'C')
+
+    # Grilla y eje Y
+    pdf.set_font('Arial', '', 7)
+    pdf.set_line_width(0.1)
+    pdf.set_draw_color(210)
+    for tick in range(0, 101, 20):
+        ty = y_pos(tick / 100)
+        pdf.dashed_line(plot_x, ty, plot_x + plot_w, ty, 1, 1)
+        pdf.text(plot_x - 8, ty + 1, f'{tick}%')
+    pdf.set_draw_color(120)
+    pdf.line(plot_x, plot_top, plot_x, plot_bottom)
+    pdf.line(plot_x, plot_bottom, plot_x + plot_w, plot_bottom)
+    pdf.rotated_text(x + 3, plot_top + plot_h / 2 + 14, 'AutoTrac (% de Uso)', 90)
+
+    # Barras
+    slot_w = plot_w / max(len(machines), 1)
+    bar_w = slot_w * 0.8 / len(turnos) if len(turnos) > 0 else slot_w * 0.4
+    pdf.set_font('Arial', 'B', 5 if len(machines) > 20 else 6)
+    for i, turno in enumerate(turnos):
+        pdf.set_fill_color(*_hex_to_rgb(colors[turno]))
+        for j, value in enumerate(values[turno]):
+            if not value > 0:
+                continue
+            bx = plot_x + slot_w * (j + 0.1) + bar_w * i
+            by = y_pos(value)
+            pdf.rect(bx, by, bar_w, plot_bottom - by, 'F')
+            label = f'{value * 100:.0f}%'
+            pdf.text(bx + (bar_w - pdf.get_string_width(label)) / 2, by - 0.8, label)
+
+    # Meta 80%
+    pdf.set_draw_color(231, 76, 60)
+    pdf.set_line_width(0.5)
+    pdf.dashed_line(plot_x, y_pos(0.8), plot_x + plot_w, y_pos(0.8), 2, 1.5)
+    pdf.set_line_width(0.2)
+
+    # Etiquetas de máquinas
+    pdf.set_font('Arial', '', 6 if len(machines) > 20 else 7)
+    for j, machine in enumerate(machines):
+        label = str(machine)
+        cx = plot_x + slot_w * (j + 0.5)
+        offset = pdf.get_string_width(label) * 0.7071
+        pdf.rotated_text(cx - offset, plot_bottom + 2.5 + offset, label, 45)
+
+    # Leyenda
+    pdf.set_font('Arial', '', 7)
+    legend = [(turno, _hex_to_rgb(colors[turno])) for turno in turnos] + [('Meta 80%', (231, 76, 60))]
+    lx = plot_x + plot_w
+    for label, rgb in reversed(legend):
+        lx -= pdf.get_string_width(label) + 7
+        pdf.set_fill_color(*rgb)
+        pdf.rect(lx, top + 8, 3, 3, 'F')
+        pdf.text(lx + 4, top + 10.5, label)
+
+    pdf.set_draw_color(0)
+    pdf.set_text_color(0)
+    pdf.set_xy(pdf.l_margin, top + h)
+
+def add_chart(pdf, df, title, shift_type, chart_mode='vector', dpi=200, cache=None):
+    """
+    Adds a chart to the PDF as vector graphics, or as a PNG image at the given DPI.
+    Rendered PNGs are reused from `cache` while the charted data does not change.
+    """
+    if chart_mode == 'vector':
+        draw_vector_chart(pdf, df, title, shift_type)
+        return
+
+    png = None
+    if cache is not None:
+        key = ('chart', data_fingerprint(df), title, shift_type, dpi)
+        png = cache.get(key)
+    if png is None:
+        png = create_static_chart(df, title, shift_type, dpi=dpi).getvalue()
+        if cache is not None:
+            cache.put(key, png)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
+        tmp.write(png)
+        tmp_path = tmp.name
+    pdf.image(tmp_path, x=10, w=190)
+    os.unlink(tmp_path)
+
+def executive_summary_text(processed_data, summary):
+    """
+    Executive summary and key findings, shared by the PDF and HTML reports.
+    """
+    avg_autotrac = summary['avg_autotrac']
+    total_machines = summary['total_machines']
+    total_hours = summary['total_hours']
+    machines_zero = summary['machines_zero']
+    machines_above_target = summary['machines_above_target']
     
     summary_text = (
         f"Este informe presenta un analisis detallado del uso de la tecnologia AutoTrac(TM) en la flota de maquinaria. "
@@ -141,85 +215,90 @@ def generate_pdf(processed_data, global_stats, shift_type):
     else:
         summary_text += f"- Excelente: El 100% de las maquinas utilizaron la tecnologia AutoTrac(TM)\n"
     
-    pdf.chapter_body(summary_text)
-    
-    # Global Chart
-    pdf.ln(10)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Visión Global de la Flota', 0, 1)
-    
-    # Prepare global data for plotting - EXCLUDE 'Global' from machines
-    cols = ['maquina', 'turno', 'autotrac_activo_pct']
-    df_for_chart = processed_data[processed_data['maquina'] != 'Global'][cols].copy()
-    
-    img_global = create_static_chart(df_for_chart, 'Desempeño Global por Máquina', shift_type)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
-        tmp.write(img_global.getvalue())
-        tmp_path = tmp.name
-    pdf.image(tmp_path, x=10, w=190)
-    os.unlink(tmp_path)
+    if 'sitio' in processed_data.columns:
+        summary_text += f"- Consolidado de {len(summary['sites'])} sitios: {', '.join(summary['sites'])}\n"
     
-    # --- Detail Pages ---
-    # Filtrar nulos y ordenar numéricamente
-    valid_alces = processed_data['alce'].dropna().unique()
-    unique_alces = sorted([int(a) for a in valid_alces])
+    return summary_text
+
+def site_insight_text(sitio, site_summary):
+    return (
+        f"El sitio {sitio} cuenta con {site_summary['total_machines']} maquinas y "
+        f"{site_summary['total_hours']:,.1f} horas de operacion. "
+        f"El promedio de uso de AutoTrac(TM) es del {site_summary['avg_autotrac']:.1%}; "
+        f"{site_summary['machines_above_target']} maquinas superan la meta del 80% y "
+        f"{site_summary['machines_zero']} no utilizaron la tecnologia."
+    )
+
+def alce_insight_text(alce, alce_stats):
+    """
+    Analysis paragraph of an alce detail page.
+    """
+    avg_alce = alce_stats['avg']
+    max_machine = alce_stats['best_machine']
+    max_value = alce_stats['best_value']
+    min_machine = alce_stats['worst_machine']
+    min_value = alce_stats['worst_value']
+    machines_count = alce_stats['machines']
+    above_target = alce_stats['above_target']
+    machines_zero_alce = alce_stats['machines_zero']
     
-    for i, alce in enumerate(unique_alces):
-        pdf.add_page()
-        pdf.chapter_title(f'Alce: {alce}')
-        
+    if machines_zero_alce == machines_count:
+        return (
+            f"ALERTA CRITICA: El alce {alce} cuenta con {machines_count} maquinas, "
+            f"pero NINGUNA utilizo la tecnologia AutoTrac(TM) durante el periodo analizado. "
+            f"Se requiere investigacion inmediata sobre las causas de esta situacion."
+        )
+    elif machines_zero_alce > 0:
+        return (
+            f"El alce {alce} cuenta con {machines_count} maquinas en operacion. "
+            f"El promedio de uso de AutoTrac es del {avg_alce:.1%}. "
+            f"{above_target} maquinas superan la meta del 80%. "
+            f"ATENCION: {machines_zero_alce} maquina(s) NO utilizaron AutoTrac(TM). "
+            f"La maquina con mejor desempeno es {max_machine} ({max_value:.1%})."
+        )
+    return (
+        f"El alce {alce} cuenta con {machines_count} maquinas en operacion. "
+        f"El promedio de uso de AutoTrac es del {avg_alce:.1%}. "
+        f"{above_target} maquinas superan la meta del 80%. "
+        f"La maquina con mejor desempeno es {max_machine} ({max_value:.1%}), "
+        f"mientras que {min_machine} presenta el menor uso ({min_value:.1%})."
+    )
+
+def alce_recommendation_text(alce, alce_stats):
+    if alce_stats['avg'] < 0.8:
+        return f"- Reforzar capacitacion en el uso de AutoTrac para operadores del alce {alce}.\n- Revisar configuracion de equipos con bajo rendimiento."
+    return f"- Mantener las practicas actuales que han resultado en un excelente desempeno.\n- Compartir mejores practicas con otros alces."
+
+def add_alce_pages(pdf, processed_data, summary, shift_type, chart_mode='vector', dpi=200, title_prefix='', cache=None):
+    """
+    Adds one detail page per alce (insights, chart, recommendations and notes).
+    With a cache, vector pages of alces whose data did not change since an earlier
+    report are copied from it instead of being laid out again.
+    """
+    for i, alce in enumerate(summary['alce_order']):
         # Filtrar datos del alce
         df_alce = processed_data[processed_data['alce'] == alce]
         
-        # Calcular métricas para insights
-        avg_alce = df_alce['autotrac_activo_pct'].mean()
-        max_machine = df_alce.loc[df_alce['autotrac_activo_pct'].idxmax(), 'maquina'] if not df_alce.empty else 'N/A'
-        max_value = df_alce['autotrac_activo_pct'].max() if not df_alce.empty else 0
-        min_machine = df_alce.loc[df_alce['autotrac_activo_pct'].idxmin(), 'maquina'] if not df_alce.empty else 'N/A'
-        min_value = df_alce['autotrac_activo_pct'].min() if not df_alce.empty else 0
-        machines_count = df_alce['maquina'].nunique()
-        above_target = (df_alce['autotrac_activo_pct'] >= 0.8).sum()
-        machines_zero_alce = (df_alce.groupby('maquina')['autotrac_activo_pct'].mean() == 0).sum()
+        pdf.add_page()
+        reuse = cache is not None and chart_mode == 'vector'
+        if reuse:
+            key = cache.page_key(pdf, data_fingerprint(df_alce), alce, title_prefix, shift_type)
+            if cache.replay_page(pdf, key):
+                continue
+            start = cache.page_start(pdf)
+        
+        pdf.chapter_title(f'{title_prefix}Alce: {alce}')
+        
+        # Métricas precalculadas para insights
+        alce_stats = summary['alces'][alce]
         
         # Texto de análisis
         pdf.set_font('Arial', '', 11)
-        
-        if machines_zero_alce == machines_count:
-            analysis_text = (
-                f"ALERTA CRITICA: El alce {alce} cuenta con {machines_count} maquinas, "
-                f"pero NINGUNA utilizo la tecnologia AutoTrac(TM) durante el periodo analizado. "
-                f"Se requiere investigacion inmediata sobre las causas de esta situacion."
-            )
-        elif machines_zero_alce > 0:
-            analysis_text = (
-                f"El alce {alce} cuenta con {machines_count} maquinas en operacion. "
-                f"El promedio de uso de AutoTrac es del {avg_alce:.1%}. "
-                f"{above_target} maquinas superan la meta del 80%. "
-                f"ATENCION: {machines_zero_alce} maquina(s) NO utilizaron AutoTrac(TM). "
-                f"La maquina con mejor desempeno es {max_machine} ({max_value:.1%})."
-            )
-        else:
-            analysis_text = (
-                f"El alce {alce} cuenta con {machines_count} maquinas en operacion. "
-                f"El promedio de uso de AutoTrac es del {avg_alce:.1%}. "
-                f"{above_target} maquinas superan la meta del 80%. "
-                f"La maquina con mejor desempeno es {max_machine} ({max_value:.1%}), "
-                f"mientras que {min_machine} presenta el menor uso ({min_value:.1%})."
-            )
-        
-        pdf.multi_cell(0, 6, analysis_text)
+        pdf.multi_cell(0, 6, alce_insight_text(alce, alce_stats))
         pdf.ln(5)
         
         # Gráfico
-        img_alce = create_static_chart(df_alce, f'Rendimiento Detallado - Alce {alce}', shift_type)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
-            tmp.write(img_alce.getvalue())
-            tmp_path = tmp.name
-        
-        pdf.image(tmp_path, x=10, w=190)
-        os.unlink(tmp_path)
+        add_chart(pdf, df_alce, f'Rendimiento Detallado - Alce {alce}', shift_type, chart_mode, dpi, cache)
         
         # Recomendaciones
         pdf.ln(5)
@@ -228,13 +307,7 @@ def generate_pdf(processed_data, global_stats, shift_type):
         pdf.cell(0, 8, 'Recomendaciones:', 0, 1)
         pdf.set_font('Arial', '', 10)
         pdf.set_text_color(0)
-        
-        if avg_alce < 0.8:
-            recommendation = f"- Reforzar capacitacion en el uso de AutoTrac para operadores del alce {alce}.\n- Revisar configuracion de equipos con bajo rendimiento."
-        else:
-            recommendation = f"- Mantener las practicas actuales que han resultado en un excelente desempeno.\n- Compartir mejores practicas con otros alces."
-        
-        pdf.multi_cell(0, 5, recommendation)
+        pdf.multi_cell(0, 5, alce_recommendation_text(alce, alce_stats))
         
         # Espacio para notas
         pdf.ln(5)
@@ -245,7 +318,74 @@ def generate_pdf(processed_data, global_stats, shift_type):
         pdf.set_font('Arial', 'I', 9)
         pdf.set_text_color(120)
         pdf.multi_cell(180, 4, "Notas adicionales:\n_____________________________________________________________________________\n_____________________________________________________________________________")
+        
+        if reuse:
+            cache.store_page(pdf, key, start)
+
+def generate_pdf(processed_data, global_stats, shift_type, summary=None, chart_mode='vector', dpi=200, use_cache=True):
+    from modules.pdf_document import ProfessionalPDF
 
+    cache = REPORT_CACHE if use_cache else None
+
+    if summary is None:
+        summary = build_fleet_summary(processed_data, global_stats)
+    
+    # Todos los PNG del informe en un solo lote sobre la figura plantilla
+    if cache is not None and chart_mode == 'raster':
+        prerender_charts(processed_data, summary, shift_type, dpi, cache)
+
+    pdf = ProfessionalPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    
+    # --- Cover Page ---
+    pdf.add_page()
+    pdf.ln(60)
+    pdf.set_font('Arial', 'B', 24)
+    pdf.set_text_color(54, 124, 57)
+    pdf.cell(0, 20, 'Informe de Productividad', 0, 1, 'C')
+    
+    pdf.set_font('Arial', '', 14)
+    pdf.set_text_color(80)
+    pdf.cell(0, 10, 'Análisis de Uso de AutoTrac(TM)', 0, 1, 'C')
+    
+    pdf.ln(20)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 10, f'Fecha: {datetime.date.today()}', 0, 1, 'C')
+    pdf.ln(50)
+    
+    # --- Executive Summary ---
+    pdf.add_page()
+    pdf.chapter_title('Resumen Ejecutivo')
+    
+    pdf.chapter_body(executive_summary_text(processed_data, summary))
+    
+    # Global Chart
+    pdf.ln(10)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Visión Global de la Flota', 0, 1)
+    
+    # Prepare global data for plotting - EXCLUDE 'Global' from machines
+    cols = ['maquina', 'turno', 'autotrac_activo_pct']
+    
+    if 'sitio' not in processed_data.columns:
+        df_for_chart = processed_data.loc[processed_data['maquina'] != 'Global', cols]
+        add_chart(pdf, df_for_chart, 'Desempeño Global por Máquina', shift_type, chart_mode, dpi, cache)
+        
+        # --- Detail Pages ---
+        add_alce_pages(pdf, processed_data, summary, shift_type, chart_mode, dpi, cache=cache)
+    else:
+        # Multi-sitio: comparación entre sitios y un capítulo por sitio
+        df_sites = summary['site_stats'][['sitio', 'turno', 'autotrac_activo_pct']].rename(columns={'sitio': 'maquina'})
+        add_chart(pdf, df_sites, 'Desempeño por Sitio', shift_type, chart_mode, dpi, cache)
+        
+        for sitio, site_summary in summary['sites'].items():
+            df_site = processed_data[processed_data['sitio'] == sitio]
+            pdf.add_page()
+            pdf.chapter_title(f'Sitio: {sitio}')
+            pdf.chapter_body(site_insight_text(sitio, site_summary))
+            add_chart(pdf, df_site[cols], f'Desempeño por Máquina - {sitio}', shift_type, chart_mode, dpi, cache)
+            add_alce_pages(pdf, df_site, site_summary, shift_type, chart_mode, dpi, title_prefix=f'{sitio} - ', cache=cache)
+    
     # Return as bytes
     output = pdf.output(dest='S')
     if isinstance(output, str):
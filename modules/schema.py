@@ -0,0 +1,98 @@
+
+import re
+from functools import lru_cache
+
+# Limpieza tipo janitor::clean_names en una sola pasada
+_CLEAN_TABLE = str.maketrans({' ': '_', '-': '_', '.': '_', '(': None, ')': None})
+
+_HOURS_UNIT = r'(?=.*(?:_h$|_h_|\(h\)))'
+
+# Formatos de exportación conocidos: reglas por rol, en orden de prioridad.
+# Para un nuevo formato o variante de encabezados, agregar una versión nueva en lugar de editar una existente.
+EXPORT_FORMATS = {
+    ('operations_center', 1): {
+        # Cada columna toma el primer destino que coincida; cada destino se asigna una sola vez
+        'shift': [
+            ('maquina', r'maquina|máquina|equipo|unidad|machine'),
+            ('autotrac_activo_h', r'^(?=.*autotrac)(?=.*activo)' + _HOURS_UNIT),
+            ('utilizacion_cosecha_h', r'^(?=.*utilizac)(?=.*cosecha)' + _HOURS_UNIT),
+        ],
+        # Maestro de Alces: gana la última regla que coincida y un destino puede repetirse
+        'alces': [
+            ('maquina', r'maquina|máquina|equipo|unidad'),
+            ('alce', r'alce'),
+        ],
+    },
+}
+
+SINGLE_MATCH_ROLES = {'shift'}
+
+def _compile(formats):
+    return {
+        key: {role: [(target, re.compile(pattern)) for target, pattern in rules] for role, rules in roles.items()}
+        for key, roles in formats.items()
+    }
+
+_COMPILED = _compile(EXPORT_FORMATS)
+
+def clean_header(name):
+    """
+    Snake-cases one header (lowercase, spaces/dashes/dots to '_', parentheses dropped).
+    """
+    return str(name).lower().translate(_CLEAN_TABLE)
+
+@lru_cache(maxsize=256)
+def clean_columns(header):
+    return tuple(clean_header(c) for c in header)
+
+def _match(role, rules, cleaned):
+    mapped = list(cleaned)
+    found = set()
+    for position, col in enumerate(cleaned):
+        for target, pattern in rules:
+            if role in SINGLE_MATCH_ROLES and target in found:
+                continue
+            if pattern.search(col):
+                mapped[position] = target
+                found.add(target)
+                if role in SINGLE_MATCH_ROLES:
+                    break
+    return tuple(mapped), found
+
+@lru_cache(maxsize=256)
+def resolve_columns(role, header):
+    """
+    Cleans a raw header tuple and maps it to the pipeline's column names for a role
+    ('shift' or 'alces'). Tries each registered format in order and keeps the first that
+    resolves every target (else the one resolving the most). Memoized per header tuple, so
+    repeated exports in a known format cost one dictionary lookup.
+    Returns (columns, (format_name, version)).
+    """
+    cleaned = clean_columns(header)
+    best = None
+    for key, roles in _COMPILED.items():
+        rules = roles.get(role)
+        if rules is None:
+            continue
+        mapped, found = _match(role, rules, cleaned)
+        targets = {target for target, _ in rules}
+        if found == targets:
+            return mapped, key
+        if best is None or len(found) > best[2]:
+            best = (mapped, key, len(found))
+    return (best[0], best[1]) if best else (cleaned, None)
+
+def missing_targets(role, header):
+    """
+    Pipeline columns of a role that a raw header does not resolve to (empty when it is complete).
+    """
+    columns, key = resolve_columns(role, tuple(header))
+    rules = _COMPILED[key][role] if key else next(iter(_COMPILED.values())).get(role, [])
+    return {target for target, _ in rules} - set(columns)
+
+def apply_schema(df, role):
+    """
+    Relabels df's columns in place (no data copy) and returns it.
+    """
+    df.columns = list(resolve_columns(role, tuple(df.columns))[0])
+    return df
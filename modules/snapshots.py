@@ -0,0 +1,148 @@
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+SNAPSHOT_DIR = os.environ.get(
+    'AUTOTRAC_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'snapshots')
+)
+
+def _fingerprint(data):
+    hashed = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+def _write_ipc(df, path):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Sin compresión: el archivo se puede mapear en memoria sin copiar
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_ipc(path):
+    import pyarrow as pa
+
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+# El día operativo va de 6:00 a 6:00: el turno que cruza la medianoche cuenta para el día en que empezó
+DAY_START_HOUR = 6
+
+def snapshot_date(meta):
+    """
+    Operational day of a snapshot; older snapshots without one fall back to the day they were saved.
+    """
+    return meta.get('operational_date') or meta['created'][:10]
+
+def save_snapshot(data, global_stats, shift_type, snapshot_dir=None, operational_date=None):
+    """
+    Saves a processed day as Arrow IPC files (merged frame + global stats) plus metadata.
+    Rows are sorted by alce so each alce partition is a contiguous, zero-copy slice.
+    operational_date is the day the exports cover (default: the current operational day).
+    Returns the snapshot id; an identical result for the same day is not written twice.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    fingerprint = _fingerprint(data)
+    now = datetime.datetime.now()
+    if operational_date is None:
+        operational_date = (now - datetime.timedelta(hours=DAY_START_HOUR)).date()
+    operational_date = operational_date.isoformat()
+
+    for meta in list_snapshots(snapshot_dir):
+        if (meta['fingerprint'] == fingerprint and meta['shift_type'] == shift_type
+                and snapshot_date(meta) == operational_date):
+            return meta['id']
+
+    snapshot_id = f"{now:%Y%m%d-%H%M%S}_{shift_type}_{fingerprint[:8]}"
+
+    data = data.sort_values('alce', kind='stable', na_position='last').reset_index(drop=True)
+    alce_values = data['alce'].dropna()
+    partitions = {}
+    for alce, rows in alce_values.groupby(alce_values).groups.items():
+        partitions[str(int(alce))] = [int(rows.min()), int(len(rows))]
+
+    machines = data[['sitio', 'maquina']].drop_duplicates() if 'sitio' in data.columns else data['maquina'].unique()
+    meta = {
+        'id': snapshot_id,
+        'created': now.isoformat(timespec='seconds'),
+        'operational_date': operational_date,
+        'shift_type': shift_type,
+        'fingerprint': fingerprint,
+        'rows': int(len(data)),
+        'machines': int(len(machines)),
+        'sites': sorted(data['sitio'].unique().tolist()) if 'sitio' in data.columns else [],
+        'alce_partitions': partitions,
+    }
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=snapshot_dir, prefix='.tmp_')
+    try:
+        _write_ipc(data, os.path.join(tmp_dir, 'data.arrow'))
+        _write_ipc(global_stats, os.path.join(tmp_dir, 'global_stats.arrow'))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.rename(tmp_dir, os.path.join(snapshot_dir, snapshot_id))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return snapshot_id
+
+def list_snapshots(snapshot_dir=None):
+    """
+    Returns the metadata of the saved snapshots, newest first.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    if not os.path.isdir(snapshot_dir):
+        return []
+
+    snapshots = []
+    for name in os.listdir(snapshot_dir):
+        meta_path = os.path.join(snapshot_dir, name, 'meta.json')
+        if name.startswith('.') or not os.path.exists(meta_path):
+            continue
+        with open(meta_path, encoding='utf-8') as f:
+            snapshots.append(json.load(f))
+    return sorted(snapshots, key=lambda m: m['created'], reverse=True)
+
+def load_snapshot(snapshot_id, snapshot_dir=None):
+    """
+    Memory-maps a snapshot and returns (data, global_stats, meta).
+    Columns stay Arrow-backed on top of the mapped file, so reopening costs no parsing
+    and the pages are shared through the OS cache by every session that opens it.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    path = os.path.join(snapshot_dir, snapshot_id)
+
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+
+    data = _read_ipc(os.path.join(path, 'data.arrow')).to_pandas(types_mapper=pd.ArrowDtype)
+    global_stats = _read_ipc(os.path.join(path, 'global_stats.arrow')).to_pandas(types_mapper=pd.ArrowDtype)
+    return data, global_stats, meta
+
+def load_alce(snapshot_id, alce, snapshot_dir=None):
+    """
+    Returns a single alce partition as a zero-copy slice of the mapped snapshot.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    path = os.path.join(snapshot_dir, snapshot_id)
+
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        offset, length = json.load(f)['alce_partitions'][str(int(alce))]
+
+    table = _read_ipc(os.path.join(path, 'data.arrow'))
+    return table.slice(offset, length).to_pandas(types_mapper=pd.ArrowDtype)
+
+def snapshot_label(meta):
+    created = datetime.datetime.fromisoformat(meta['created'])
+    scheme = '8 Horas' if meta['shift_type'] == '8h' else '12 Horas'
+    sites = f" · {len(meta['sites'])} sitios" if meta['sites'] else ''
+    return f"{snapshot_date(meta)} · {scheme} · {meta['machines']} máquinas{sites} · guardado {created:%d-%m %H:%M}"
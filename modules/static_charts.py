@@ -0,0 +1,95 @@
+
+import io
+import threading
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+# Figuras plantilla reutilizables (una por gráfico en curso; Agg explícito, sin pyplot)
+POOL_SIZE = 4
+FIG_HEIGHT = 5
+
+_pool = []
+_pool_lock = threading.Lock()
+
+def _new_template():
+    """
+    Builds a figure with everything that does not depend on the data: axis label,
+    limits, % formatter, grid and the 80% target line.
+    """
+    fig = Figure(figsize=(8, FIG_HEIGHT))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_ylabel('AutoTrac (% de Uso)', fontsize=11, fontweight='bold')
+    ax.axhline(y=0.8, color='r', linestyle='--', linewidth=2, label='Meta 80%')
+    ax.set_ylim(0, 1.05)
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f'{y*100:.0f}%'))
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    return fig, ax
+
+def _acquire():
+    with _pool_lock:
+        if _pool:
+            return _pool.pop()
+    return _new_template()
+
+def _release(template):
+    with _pool_lock:
+        if len(_pool) < POOL_SIZE:
+            _pool.append(template)
+
+def _reset(ax):
+    for container in list(ax.containers):
+        container.remove()
+    for text in list(ax.texts):
+        text.remove()
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
+
+def _draw(fig, ax, machines, turnos, colors, values, title, dpi):
+    _reset(ax)
+
+    x = np.arange(len(machines))
+    width = 0.8 / len(turnos) if len(turnos) > 0 else 0.4
+
+    # Ajustar tamaño según cantidad de máquinas
+    fig.set_size_inches(min(12, max(8, len(machines) * 0.6)), FIG_HEIGHT)
+
+    bars = []
+    for i, turno in enumerate(turnos):
+        rects = ax.bar(x + width * i, values[turno], width, label=turno, color=colors.get(turno, 'blue'))
+        bars.append(rects)
+
+        # Etiquetas con formato correcto
+        for rect, val in zip(rects, values[turno] * 100):
+            height = rect.get_height()
+            if height > 0:
+                ax.text(rect.get_x() + rect.get_width() / 2., height, f'{val:.0f}%',
+                        ha='center', va='bottom', fontsize=8, fontweight='bold')
+
+    ax.set_title(title, pad=20, fontsize=13, fontweight='bold')
+    ax.set_xticks(x + width * (len(turnos) - 1) / 2)
+    ax.set_xticklabels(machines, rotation=45, ha='right', fontsize=9)
+    if bars:
+        ax.legend(handles=bars, loc='upper right', framealpha=0.9)
+    ax.relim()
+    ax.autoscale_view(scaley=False)
+
+    fig.tight_layout()
+    img_buf = io.BytesIO()
+    fig.savefig(img_buf, format='png', dpi=dpi, bbox_inches='tight')
+    return img_buf
+
+def render_charts(charts, dpi=200):
+    """
+    Renders a batch of bar charts on one pooled template figure.
+    charts: iterable of (machines, turnos, colors, values, title), as from prepare_chart_data.
+    Returns the PNG buffers in the same order.
+    """
+    fig, ax = template = _acquire()
+    try:
+        return [_draw(fig, ax, *chart, dpi) for chart in charts]
+    finally:
+        _release(template)
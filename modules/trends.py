@@ -0,0 +1,121 @@
+
+import pandas as pd
+
+from modules import snapshots
+
+HOURS = ['autotrac_activo_h', 'utilizacion_cosecha_h']
+WINDOWS = (7, 14)
+DROP_THRESHOLD = 0.10
+SHIFT_ORDER = {
+    '8h': ['Turno 6-2', 'Turno 2-10', 'Turno 10-6'],
+    '12h': ['Turno 6am-6pm', 'Turno 6pm-6am'],
+}
+
+def load_history(shift_type, multi_site=False, snapshot_dir=None, loader=None):
+    """
+    Stacks the saved days of a shift scheme with a 'fecha' column (operational day of each snapshot).
+    Single-site and multi-site analyses form separate histories. When a day (per site, for
+    multi-site) was processed more than once, its latest snapshot wins.
+    """
+    loader = loader or snapshots.load_snapshot
+    latest = {}
+    for meta in snapshots.list_snapshots(snapshot_dir):
+        if meta['shift_type'] != shift_type or bool(meta.get('sites')) != multi_site:
+            continue
+        day = snapshots.snapshot_date(meta)
+        for sitio in meta.get('sites') or [None]:
+            latest.setdefault((day, sitio), meta['id'])
+
+    # Un snapshot puede aportar varios sitios de su día: se carga una sola vez
+    claimed = {}
+    for (day, sitio), snapshot_id in latest.items():
+        claimed.setdefault(snapshot_id, (day, []))[1].append(sitio)
+
+    frames = []
+    for snapshot_id, (day, sitios) in claimed.items():
+        data = loader(snapshot_id, snapshot_dir)[0]
+        if multi_site:
+            data = data[data['sitio'].isin(sitios)]
+        cols = [c for c in ['sitio', 'maquina', 'turno', 'alce'] + HOURS if c in data.columns]
+        frames.append(data[cols].assign(fecha=pd.Timestamp(day)))
+
+    if not frames:
+        return pd.DataFrame(columns=(['sitio'] if multi_site else []) + ['maquina', 'turno', 'alce', 'fecha'] + HOURS)
+    history = pd.concat(frames, ignore_index=True)
+    history[HOURS] = history[HOURS].astype('float64')
+    return history
+
+def _ratio(autotrac, util):
+    return autotrac / util.where(util > 0)
+
+def daily_totals(history, by):
+    """
+    Sums the hours per group and day.
+    """
+    return (history.groupby(list(by) + ['fecha'], dropna=False, observed=True)[HOURS]
+            .sum().reset_index().sort_values(list(by) + ['fecha'], ignore_index=True))
+
+def rolling_adoption(history, by=('maquina',), windows=WINDOWS):
+    """
+    Rolling adoption per group: for each window of N calendar days, the ratio of the summed
+    AutoTrac hours over the summed harvest hours (not an average of daily percentages).
+    Adds autotrac_Nd, util_Nd and ratio_Nd columns; computed as grouped time windows.
+    """
+    by = list(by)
+    daily = daily_totals(history, by)
+
+    for window in windows:
+        # daily ya está ordenado por grupo y fecha: el resultado se alinea por posición
+        if by:
+            sums = daily.groupby(by, sort=False, dropna=False).rolling(f'{window}D', on='fecha')[HOURS].sum()
+        else:
+            sums = daily.rolling(f'{window}D', on='fecha')[HOURS].sum()
+        daily[f'autotrac_{window}d'] = sums['autotrac_activo_h'].to_numpy()
+        daily[f'util_{window}d'] = sums['utilizacion_cosecha_h'].to_numpy()
+        daily[f'ratio_{window}d'] = _ratio(daily[f'autotrac_{window}d'], daily[f'util_{window}d'])
+
+    daily['ratio_dia'] = _ratio(daily['autotrac_activo_h'], daily['utilizacion_cosecha_h'])
+    daily.attrs['by'] = by
+    return daily
+
+def shift_deltas(history, shift_type, by=()):
+    """
+    Daily adoption per shift and the difference between consecutive shifts
+    (e.g. 'Turno 2-10 vs Turno 6-2'), per group.
+    """
+    by = list(by)
+    daily = daily_totals(history, by + ['turno'])
+    daily['pct'] = _ratio(daily['autotrac_activo_h'], daily['utilizacion_cosecha_h'])
+
+    wide = daily.pivot_table(index=by + ['fecha'], columns='turno', values='pct', observed=True)
+    order = [t for t in SHIFT_ORDER[shift_type] if t in wide.columns]
+    deltas = wide[order].copy()
+    for previous, current in zip(order, order[1:]):
+        deltas[f'{current} vs {previous}'] = wide[current] - wide[previous]
+    deltas.columns.name = None
+    return deltas.reset_index()
+
+def dropping_adoption(trends, threshold=DROP_THRESHOLD, short=7, long=14):
+    """
+    Groups whose adoption over the last `short` days fell at least `threshold` below the
+    `long - short` days before it. Both ratios come from the rolling sums of each group's
+    latest day, so no per-group loop is needed. Only groups seen on the history's last day
+    (per site, when grouped by site) are evaluated: an older window is not a current drop.
+    """
+    by = trends.attrs.get('by', ['maquina'])
+    latest = trends.groupby(by, dropna=False).tail(1) if by else trends.tail(1)
+
+    # Una máquina que dejó de aparecer conserva ventanas viejas: no se compara contra hoy
+    if 'sitio' in by:
+        last_day = trends.groupby('sitio', dropna=False)['fecha'].transform('max').loc[latest.index]
+    else:
+        last_day = trends['fecha'].max()
+    latest = latest[latest['fecha'] == last_day]
+
+    prev_util = latest[f'util_{long}d'] - latest[f'util_{short}d']
+    prev_autotrac = latest[f'autotrac_{long}d'] - latest[f'autotrac_{short}d']
+    latest = latest.assign(ratio_previo=_ratio(prev_autotrac, prev_util))
+    latest['variacion'] = latest[f'ratio_{short}d'] - latest['ratio_previo']
+
+    dropping = latest[latest['variacion'] <= -threshold]
+    return dropping[by + ['fecha', f'ratio_{short}d', 'ratio_previo', 'variacion']].sort_values('variacion', ignore_index=True)
@@ -1,5 +1,4 @@
 
-import plotly.graph_objects as go
 import pandas as pd
 
 def get_color_map(shift_type):
@@ -19,10 +18,11 @@ def create_global_chart(df, global_stats, shift_type):
     """
     Creates a Professional Combo Chart: Bars for Machine values, Scatter/Line for Global Average/Target.
     """
+    import plotly.graph_objects as go
     
     # Prepare Data
     cols = ['maquina', 'turno', 'autotrac_activo_pct']
-    df_subset = df[cols].copy()
+    df_subset = df[cols]
     
     # Sort by Machine Name for consistency
     df_subset = df_subset.sort_values('maquina')
@@ -72,11 +72,82 @@ def create_global_chart(df, global_stats, shift_type):
 
     return fig
 
+def create_trend_chart(trends, group_col=None, window=7):
+    """
+    Rolling adoption over time (ratio of summed hours), one line per group or one for the fleet.
+    group_col can be a list (e.g. ['sitio', 'maquina']): the line is labelled with each key.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    ratio_col = f'ratio_{window}d'
+    groups = trends.groupby(group_col, sort=True) if group_col else [('Flota', trends)]
+
+    for name, subset in groups:
+        if isinstance(name, tuple):
+            label = ' · '.join(str(n) for n in name)
+        else:
+            label = f"Alce {int(name)}" if group_col == 'alce' and pd.notna(name) else str(name)
+        fig.add_trace(go.Scatter(
+            x=subset['fecha'],
+            y=subset[ratio_col],
+            name=label,
+            mode='lines+markers',
+            hovertemplate='%{x|%d-%m}: %{y:.1%}'
+        ))
+
+    fig.add_hline(y=0.8, line_dash="dash", line_color="#e74c3c", annotation_text="Meta 80%", annotation_position="top left")
+
+    fig.update_layout(
+        title=f"Tendencia de Adopción (ventana móvil {window} días)",
+        yaxis_title="AutoTrac™ Activo (%)",
+        yaxis_tickformat='.0%',
+        yaxis_range=[0, 1.1],
+        template="plotly_white",
+        hovermode="x unified"
+    )
+
+    return fig
+
+def create_shift_delta_chart(deltas, shift_type):
+    """
+    Daily difference in adoption between consecutive shifts for the fleet.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    colors = get_color_map(shift_type)
+
+    for col in [c for c in deltas.columns if ' vs ' in c]:
+        current = col.split(' vs ')[0]
+        fig.add_trace(go.Bar(
+            x=deltas['fecha'],
+            y=deltas[col],
+            name=col,
+            marker_color=colors.get(current),
+            texttemplate='%{y:+.0%}',
+            textposition='auto'
+        ))
+
+    fig.add_hline(y=0, line_color="#94a3b8")
+
+    fig.update_layout(
+        title="Diferencia de Adopción entre Turnos",
+        yaxis_title="Diferencia (puntos %)",
+        yaxis_tickformat='+.0%',
+        barmode='group',
+        template="plotly_white"
+    )
+
+    return fig
+
 def create_alce_chart(df, alce_name, shift_type):
     """
     Creates chart for a specific Alce.
     """
-    df_filtered = df[df['alce'] == alce_name].copy()
+    import plotly.graph_objects as go
+
+    df_filtered = df[df['alce'] == alce_name]
     
     if df_filtered.empty:
         return None
@@ -116,3 +187,42 @@ def create_alce_chart(df, alce_name, shift_type):
     return fig
 
 
+
+def create_site_chart(site_stats, shift_type):
+    """
+    Creates the site comparison chart for multi-site runs (one group of bars per site).
+    """
+    import plotly.graph_objects as go
+
+    sites = sorted(site_stats['sitio'].unique())
+
+    fig = go.Figure()
+    colors = get_color_map(shift_type)
+
+    for turno, color in colors.items():
+        subset = site_stats[site_stats['turno'] == turno]
+        trace_data = subset.set_index('sitio').reindex(sites).reset_index().fillna(0)
+
+        fig.add_trace(go.Bar(
+            x=trace_data['sitio'],
+            y=trace_data['autotrac_activo_pct'],
+            name=turno,
+            marker_color=color,
+            text=trace_data['autotrac_activo_pct'],
+            texttemplate='%{y:.0%}',
+            textposition='auto'
+        ))
+
+    fig.add_hline(y=0.8, line_dash="dash", line_color="#e74c3c", annotation_text="Meta 80%", annotation_position="top left")
+
+    fig.update_layout(
+        title="Desempeño por Sitio",
+        yaxis_title="AutoTrac™ Activo (%)",
+        yaxis_tickformat='.0%',
+        yaxis_range=[0, 1.1],
+        legend_title="Turno",
+        barmode='group',
+        template="plotly_white"
+    )
+
+    return fig